@@ -31,6 +31,8 @@ SETUP REQUIREMENTS:
 5. Bot Token:
    - Replace "YOUR_BOT_TOKEN_HERE" at the end of this file with your actual bot token
 
+   Optional: install uvloop (pip install uvloop) for a faster event loop on Linux/macOS
+
 6. Commands:
    - !register - Register for tournaments
    - !join [queue_number] - Join a queue
@@ -49,33 +51,51 @@ from discord.ext import tasks
 from discord import Option, SlashCommandGroup
 from discord.commands import slash_command, permissions
 import random
+import asyncio
+import re
 from discord.ui import Button, View, Select
 from collections import Counter
+from dataclasses import dataclass, field
+from itertools import chain
 import datetime
 import logging
 import os
 import db  # Import the database module
+import logs
+import loops
 
 # Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("bot.log"),
-        logging.StreamHandler()
-    ]
-)
+logs.setup_logging("bot.log")
 logger = logging.getLogger("discord_bot")
 
+# The bot binds to its loop on init, so the loop is created here and passed in
+bot_loop = loops.new_event_loop()
+asyncio.set_event_loop(bot_loop)
+
 intents = discord.Intents.default()
 intents.members = True
 intents.voice_states = True
 intents.guilds = True
+# Message events are only used to clean up the register channel; every command is a
+# slash command, so message content is never read
 intents.messages = True
-intents.message_content = True
+intents.message_content = False
+
+# Time allowed at shutdown for queued match player rows to reach the database
+DB_FLUSH_TIMEOUT = 10  # seconds
+
+class TournamentBot(discord.Bot):
+    async def close(self):
+        """Write out queued database rows and close the database pools before disconnecting"""
+        try:
+            await asyncio.wait_for(db.flush(), timeout=DB_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error("❌ Timed out writing queued match players to the database")
+        await db.close_pools()
+        await super().close()
 
 # Initialize bot with slash commands
-bot = discord.Bot(intents=intents, debug_guilds=None)  # Set debug_guilds to specific IDs for faster command registration during development
+bot = TournamentBot(intents=intents, debug_guilds=None, loop=bot_loop)  # Set debug_guilds to specific IDs for faster command registration during development
 
 # Bot color scheme
 PRIMARY_COLOR = 0x3498db  # Blue
@@ -83,221 +103,488 @@ SUCCESS_COLOR = 0x2ecc71  # Green
 WARNING_COLOR = 0xe74c3c  # Red
 INFO_COLOR = 0xf1c40f     # Yellow
 
+# Embed templates for frequent event/command responses, copied and filled in per use
+TPL_VC_JOINED = discord.Embed(title="Voice Channel Joined", color=INFO_COLOR)
+TPL_QUEUE_LEFT = discord.Embed(title="Queue Update", color=WARNING_COLOR)
+TPL_REGISTERED = discord.Embed(title="Registration Successful", color=SUCCESS_COLOR)
+TPL_QUEUE_JOINED = discord.Embed(color=PRIMARY_COLOR)
+
 # List of maps for voting
-map_pool = ["Plaza", "Castello", "Village", "Canals", "Legacy", "Raid", "Grounded", "Bureau"]
+MAP_POOL = ("Plaza", "Castello", "Village", "Canals", "Legacy", "Raid", "Grounded", "Bureau")
+AVAILABLE_MAPS_TEXT = "\n".join(f"• {m}" for m in MAP_POOL)
+
+# Channel name patterns for queue voice ("Queue 1") and text ("queue-1-chat") channels
+QUEUE_VC_RE = re.compile(r"^Queue (\d+)$")
+QUEUE_CHAT_RE = re.compile(r"^queue-(\d+)-chat$")
+
+# Queue progress bars for 0..10 players
+PROGRESS_BARS = tuple("▰" * i + "▱" * (10 - i) for i in range(11))
+
+# Roles allowed to use admin commands
+ADMIN_ROLES = frozenset({"Owner", "COM MODERATOR", "COM ADMIN", "COM CAPTAIN"})
+
+# Team index (0 = Team A, 1 = Team B) picking on each turn of the draft
+TEAM_ORDER = (0, 1, 1, 0, 0, 1, 0)
+
+# /help field texts
+HELP_PLAYER_COMMANDS = """
+🔹 `/register` – Register yourself for the game.
+🔹 `/join [queue_number]` – Join the queue (must be in the corresponding voice channel).
+🔹 `/queue [queue_number]` – View the status of a specific queue.
+🔹 `/queues` – Show all active queues and their status.
+🔹 `/score [@user]` – View your own or another player's statistics.
+🔹 `/leaderboard` – Show the top players by points.
+🔹 `/stats [queue_number]` – View statistics for a specific queue.
+🔹 `/help` – Show this help message.
+"""
+
+HELP_ADMIN_COMMANDS = """
+🔹 `/resetqueue [queue_number]` – Reset a specific queue (Admins only).
+🔹 `/win [team]` – Report match results and update player points (Admins only).
+"""
+
+HELP_QUEUE_SYSTEM = """
+• Each queue has its own voice channel (named "Queue 1", "Queue 2", etc.)
+• Each queue has its own text channel (named "queue-1-chat", "queue-2-chat", etc.)
+• Team voice channels are created automatically as "Team 1A", "Team 1B", "Team 2A", "Team 2B", etc.
+• You must be in the voice channel to join its queue
+"""
+
+# /help embed, built once and shared by every invocation
+HELP_EMBED = discord.Embed(
+    title="Tournament Bot Commands",
+    description="These are the available commands for the tournament bot:",
+    color=PRIMARY_COLOR
+)
+HELP_EMBED.add_field(name="Player Commands", value=HELP_PLAYER_COMMANDS, inline=False)
+HELP_EMBED.add_field(name="Admin Commands", value=HELP_ADMIN_COMMANDS, inline=False)
+HELP_EMBED.add_field(name="Queue System", value=HELP_QUEUE_SYSTEM, inline=False)
+HELP_EMBED.set_footer(text="Made for tournament management")
 
 # Queue class to manage individual queue state
+@dataclass(slots=True)
 class Queue:
-    def __init__(self, queue_number):
-        self.queue_number = queue_number
-        self.players = []
-        self.captains = []
-        self.team1 = []
-        self.team2 = []
-        self.captain_votes = Counter()
-        self.map_votes = Counter()
-        self.voted_players = set()  # Track players who have voted for maps
-        self.is_active = False
-        self.current_pick_index = 0
-        self.chosen_map = None
-        
-        # Channel names
-        self.vc_name = f"Queue {queue_number}"
-        self.chat_name = f"queue-{queue_number}-chat"
-        self.team1_vc_name = f"Team {queue_number}A"
-        self.team2_vc_name = f"Team {queue_number}B"
+    queue_number: int
+    players: dict = field(default_factory=dict)  # Member ID -> Member, in join order
+    names: dict = field(default_factory=dict)  # Member ID -> display name, see snapshot_names()
+    captains: list = field(default_factory=list)  # [Team A captain, Team B captain]
+    captain_ids: set = field(default_factory=set)
+    team1: list = field(default_factory=list)
+    team2: list = field(default_factory=list)
+    captain_votes: dict = field(default_factory=dict)  # Voter ID -> candidate ID
+    map_votes: dict = field(default_factory=dict)  # Map name -> vote count
+    voted_players: set = field(default_factory=set)  # IDs of players who have voted for maps
+    map_vote_finalized: bool = False
+    is_active: bool = False
+    current_pick_index: int = 0
+    chosen_map: str = None
+    match_id: int = None
+    match_reported: bool = False
+    
+    # Channel names
+    vc_name: str = field(init=False)
+    chat_name: str = field(init=False)
+    team1_vc_name: str = field(init=False)
+    team2_vc_name: str = field(init=False)
+    
+    def __post_init__(self):
+        self.vc_name = f"Queue {self.queue_number}"
+        self.chat_name = f"queue-{self.queue_number}-chat"
+        self.team1_vc_name = f"Team {self.queue_number}A"
+        self.team2_vc_name = f"Team {self.queue_number}B"
         
     def reset(self):
         """Reset all game state variables for this queue"""
-        self.players.clear()
-        self.captains.clear()
-        self.team1.clear()
-        self.team2.clear()
-        self.captain_votes.clear()
-        self.map_votes.clear()
-        self.voted_players.clear()
-        self.is_active = False
-        self.current_pick_index = 0
-        self.chosen_map = None
-        self.match_id = None
-        self.match_reported = False
+        # Re-run __init__ so every attribute is reset, including ones added later
+        self.__init__(self.queue_number)
         
     def is_full(self):
         """Check if queue has 10 players"""
         return len(self.players) >= 10
+    
+    def snapshot_names(self):
+        """Resolve every player's display name once for the draft embeds"""
+        self.names = {p.id: p.display_name for p in chain(self.captains, self.players.values())}
 
-# Dictionary to store all queue instances
+# Queue instances per guild: {guild_id: {queue_number: Queue}}
 queues = {}
 
-@tasks.loop(seconds=10)
-async def purge_com_register():
-    await bot.wait_until_ready()
-    for guild in bot.guilds:
-        channel = discord.utils.get(guild.text_channels, name="com-register")
-        if channel:
-            try:
-                await channel.purge(limit=100)
-            except discord.Forbidden:
-                logger.warning(f"⚠️ Missing permissions to purge in {channel.name}")
-            except discord.HTTPException as e:
-                logger.error(f"❌ Failed to purge messages in {channel.name}: {e}")
+def guild_queues(guild):
+    """Get the queues of a guild, keyed by queue number"""
+    return queues.setdefault(guild.id, {})
+
+def get_queue(guild, queue_num):
+    """Get a guild's queue by number, or None if it doesn't exist"""
+    return queues.get(guild.id, {}).get(queue_num)
+
+def get_or_create_queue(guild, queue_num):
+    """Get a guild's queue by number, creating it on first use"""
+    guild_qs = guild_queues(guild)
+    queue = guild_qs.get(queue_num)
+    if queue is None:
+        queue = guild_qs[queue_num] = Queue(queue_num)
+    return queue
+
+# Per-guild cache of channel/role IDs so hot paths avoid linear name scans:
+# {guild_id: {"register": id, "queue_text": {n: id}, "queue_text_nums": {id: n}, "queue_vc": {n: id},
+#             "queue_vc_nums": {id: n}, "vc": {name: id}, "unranked": id}}
+channel_cache = {}
+
+def cache_guild(guild):
+    """Rebuild the channel/role ID cache for a guild"""
+    entry = {
+        "register": None, "queue_text": {}, "queue_text_nums": {},
+        "queue_vc": {}, "queue_vc_nums": {}, "vc": {}, "unranked": None
+    }
+    
+    for channel in guild.text_channels:
+        if channel.name == "com-register":
+            entry["register"] = channel.id
+        elif match := QUEUE_CHAT_RE.match(channel.name):
+            entry["queue_text"][int(match.group(1))] = channel.id
+            entry["queue_text_nums"][channel.id] = int(match.group(1))
+                
+    for vc in guild.voice_channels:
+        entry["vc"][vc.name] = vc.id
+        if match := QUEUE_VC_RE.match(vc.name):
+            entry["queue_vc"][int(match.group(1))] = vc.id
+            entry["queue_vc_nums"][vc.id] = int(match.group(1))
+        elif vc.name.startswith("Queue "):
+            logger.warning(f"Found voice channel with invalid queue number format: {vc.name}")
+                
+    unranked_role = discord.utils.get(guild.roles, name="UNRANKED")
+    if unranked_role:
+        entry["unranked"] = unranked_role.id
+        
+    channel_cache[guild.id] = entry
+    return entry
+
+def get_guild_cache(guild):
+    """Get the cached channel/role IDs for a guild, building them on first use"""
+    entry = channel_cache.get(guild.id)
+    if entry is None:
+        entry = cache_guild(guild)
+    return entry
+
+def get_register_channel(guild):
+    """Get the "com-register" text channel of a guild"""
+    channel_id = get_guild_cache(guild)["register"]
+    return guild.get_channel(channel_id) if channel_id else None
+
+def get_queue_text_channel(guild, queue_num):
+    """Get the "queue-N-chat" text channel of a guild"""
+    channel_id = get_guild_cache(guild)["queue_text"].get(queue_num)
+    return guild.get_channel(channel_id) if channel_id else None
+
+def queue_num_from_channel(channel):
+    """Get the queue number from a "queue-N-chat" channel, or None for any other channel"""
+    return get_guild_cache(channel.guild)["queue_text_nums"].get(channel.id)
+
+def queue_num_from_vc(channel):
+    """Get the queue number of a "Queue N" voice channel, or None for any other channel (or no channel)"""
+    if channel is None:
+        return None
+    return get_guild_cache(channel.guild)["queue_vc_nums"].get(channel.id)
+
+def get_vc(guild, name):
+    """Get a voice channel of a guild by name"""
+    channel_id = get_guild_cache(guild)["vc"].get(name)
+    return guild.get_channel(channel_id) if channel_id else None
+
+def get_unranked_role(guild):
+    """Get the "UNRANKED" role of a guild"""
+    role_id = get_guild_cache(guild)["unranked"]
+    return guild.get_role(role_id) if role_id else None
+
+# Member ID -> (avatar key, avatar URL), refreshed whenever the avatar changes
+avatar_cache = {}
+
+def avatar_url(member):
+    """Get a member's avatar URL (falling back to the default avatar), cached per member"""
+    avatar = member.avatar
+    avatar_key = avatar.key if avatar else None
+    cached = avatar_cache.get(member.id)
+    if cached and cached[0] == avatar_key:
+        return cached[1]
+        
+    url = avatar.url if avatar else member.default_avatar.url
+    avatar_cache[member.id] = (avatar_key, url)
+    return url
+
+# py-cord already retries rate limited (429) REST calls; one that still fails is hitting a global or
+# Cloudflare limit, so it gets a single retry after this long unless the response says otherwise
+RATE_LIMIT_FALLBACK_DELAY = 60  # seconds
+
+def _retry_after(e):
+    """Seconds the server asked us to wait, read from a 429 response's rate limit headers"""
+    headers = getattr(e.response, "headers", None) or {}
+    for header in ("Retry-After", "X-RateLimit-Reset-After"):
+        try:
+            return float(headers[header])
+        except (KeyError, ValueError):
+            continue
+    return None
 
-# Initialize queues on startup
-@bot.event
-async def on_ready():
-    logger.info(f"✅ Bot is ready. Logged in as {bot.user}")
+async def with_rate_limit_retry(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs), retrying once after the server's wait time if py-cord gave up on a 429"""
+    try:
+        return await fn(*args, **kwargs)
+    except discord.HTTPException as e:
+        if e.status != 429:
+            raise
+        delay = _retry_after(e) or RATE_LIMIT_FALLBACK_DELAY
+        logger.warning(f"Still rate limited after py-cord's retries, retrying once in {delay:.2f}s")
+    await asyncio.sleep(delay)
+    return await fn(*args, **kwargs)
+
+# Pending queue-chat permission updates keyed by (channel ID, member ID), so a member
+# hopping between voice channels only results in the latest overwrite being sent
+pending_permission_updates = {}
+
+async def _apply_chat_permissions(key, channel, member, overwrite):
+    # Short debounce window; a newer update for the same key cancels this one
+    await asyncio.sleep(0.2)
+    try:
+        await with_rate_limit_retry(channel.set_permissions, member, overwrite=overwrite)
+    except discord.HTTPException as e:
+        logger.error(f"❌ Failed to update permissions for {member} in {channel.name}: {e}")
+    finally:
+        if pending_permission_updates.get(key) is asyncio.current_task():
+            del pending_permission_updates[key]
+
+def schedule_chat_permissions(channel, member, overwrite):
+    """Update a member's queue-chat permissions in the background, coalescing rapid changes"""
+    key = (channel.id, member.id)
+    pending = pending_permission_updates.get(key)
+    if pending and not pending.done():
+        pending.cancel()
+    pending_permission_updates[key] = asyncio.create_task(_apply_chat_permissions(key, channel, member, overwrite))
+
+# Delay before a message posted in "com-register" is deleted
+REGISTER_DELETE_DELAY = 5  # seconds
+# Minimum age of a message before the safety sweep removes it; younger ones are left to on_message
+REGISTER_SWEEP_MIN_AGE = 30  # seconds
+# Messages older than this can't be bulk deleted (Discord's limit is 14 days), so the sweep leaves them
+REGISTER_SWEEP_MAX_AGE = datetime.timedelta(days=13, hours=23)
+
+# Last message ID seen in each register channel at the previous successful sweep
+register_last_swept = {}
+
+def _is_sweepable(message):
+    age = discord.utils.utcnow() - message.created_at
+    return REGISTER_SWEEP_MIN_AGE < age.total_seconds() and age < REGISTER_SWEEP_MAX_AGE
+
+def _newest_is_settled(channel):
+    """Whether the channel's newest message was old enough for the sweep, so none were left for a later one"""
+    if channel.last_message_id is None:
+        return True
+    age = discord.utils.utcnow() - discord.utils.snowflake_time(channel.last_message_id)
+    return age.total_seconds() > REGISTER_SWEEP_MIN_AGE
+
+@tasks.loop(minutes=5)
+async def sweep_register_channels():
+    """Safety sweep of the "com-register" channels for anything on_message missed (e.g. while offline)"""
+    # Skip channels with no new messages since the last sweep; purging them would be a wasted GET
+    channels = [
+        channel for guild in bot.guilds
+        if (channel := get_register_channel(guild))
+        and channel.last_message_id != register_last_swept.get(channel.id)
+    ]
     
-    # Initialize database
+    # Purge all guilds concurrently instead of one round-trip at a time
+    results = await asyncio.gather(
+        *(with_rate_limit_retry(channel.purge, limit=100, check=_is_sweepable, bulk=True) for channel in channels),
+        return_exceptions=True
+    )
+    for channel, result in zip(channels, results):
+        if isinstance(result, discord.Forbidden):
+            logger.warning(f"⚠️ Missing permissions to purge in {channel.name}")
+        elif isinstance(result, discord.HTTPException):
+            logger.error(f"❌ Failed to purge messages in {channel.name}: {result}")
+        elif not isinstance(result, Exception) and _newest_is_settled(channel):
+            register_last_swept[channel.id] = channel.last_message_id
+
+@sweep_register_channels.before_loop
+async def before_sweep_register_channels():
+    await bot.wait_until_ready()
+
+async def init_database():
+    """Initialize the database, logging the outcome; returns whether it succeeded"""
     try:
         db_init_success = await db.initialize_database()
         if db_init_success:
-            logger.info("✅ Database initialized successfully")
-        else:
-            logger.error("❌ Failed to initialize database")
-            logger.info("Check your database configuration in DB_CONFIG. Set environment variables (DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE) for secure configuration.")
+            logger.info(f"✅ Database initialized successfully (pool size={db.pool.size})")
+            return True
+        logger.error("❌ Failed to initialize database")
+        logger.info("Check your database configuration in DB_CONFIG. Set environment variables (DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE) for secure configuration.")
     except Exception as e:
         logger.error(f"❌ Database initialization error: {e}")
         logger.info("The bot will continue to run, but database functionality may not work correctly.")
+    return False
+
+async def create_team_channels(guild):
+    """Create the team voice channels of every queue that are missing in a guild"""
+    existing = get_guild_cache(guild)["vc"]
+    to_create = [
+        vc_name
+        for queue in guild_queues(guild).values()
+        for vc_name in (queue.team1_vc_name, queue.team2_vc_name)
+        if vc_name not in existing
+    ]
+    
+    # Create all missing channels concurrently
+    results = await asyncio.gather(*(guild.create_voice_channel(vc_name) for vc_name in to_create), return_exceptions=True)
+    for vc_name, result in zip(to_create, results):
+        if isinstance(result, discord.Forbidden):
+            logger.warning(f"⚠️ Missing permissions to create voice channels in {guild.name}")
+        elif isinstance(result, Exception):
+            logger.error(f"❌ Error creating voice channel {vc_name}: {result}")
+        else:
+            logger.info(f"✅ Created voice channel: {vc_name}")
+
+# Initialize queues on startup
+@bot.event
+async def on_ready():
+    logger.info(f"✅ Bot is ready. Logged in as {bot.user}")
     
-    # Find all queue voice channels across all guilds and initialize queue objects
+    # Find the queue voice channels of every guild and initialize queue objects
     try:
-        queue_count = 0
+        found = False
         for guild in bot.guilds:
-            for vc in guild.voice_channels:
-                if vc.name.startswith("Queue "):
-                    try:
-                        queue_num = int(vc.name.split(" ")[1])
-                        if queue_num not in queues:
-                            queues[queue_num] = Queue(queue_num)
-                            queue_count += 1
-                            logger.info(f"✅ Initialized Queue {queue_num}")
-                    except ValueError:
-                        logger.warning(f"Found voice channel with invalid queue number format: {vc.name}")
-        
-        if queue_count == 0:
+            guild_qs = guild_queues(guild)
+            queue_nums = cache_guild(guild)["queue_vc"].keys()
+            for queue_num in queue_nums - guild_qs.keys():
+                guild_qs[queue_num] = Queue(queue_num)
+                logger.info(f"✅ Initialized Queue {queue_num} in {guild.name}")
+            found = found or bool(queue_nums)
+        
+        if not found:
             logger.warning("No queue voice channels found. Create voice channels named 'Queue 1', 'Queue 2', etc.")
     except Exception as e:
         logger.error(f"Error initializing queues: {e}")
     
-    # Create team voice channels if they don't exist
-    for guild in bot.guilds:
-        for queue_num in queues:
-            team1_vc_name = queues[queue_num].team1_vc_name
-            team2_vc_name = queues[queue_num].team2_vc_name
-            
-            team1_vc = discord.utils.get(guild.voice_channels, name=team1_vc_name)
-            team2_vc = discord.utils.get(guild.voice_channels, name=team2_vc_name)
-            
-            try:
-                if not team1_vc:
-                    await guild.create_voice_channel(team1_vc_name)
-                    print(f"✅ Created voice channel: {team1_vc_name}")
-                if not team2_vc:
-                    await guild.create_voice_channel(team2_vc_name)
-                    print(f"✅ Created voice channel: {team2_vc_name}")
-            except discord.Forbidden:
-                print(f"❌ Missing permissions to create voice channels in {guild.name}")
-            except Exception as e:
-                print(f"❌ Error creating voice channels: {e}")
-    
-    purge_com_register.start()
+    # Initialize the database and create team voice channels concurrently
+    await asyncio.gather(init_database(), *(create_team_channels(guild) for guild in bot.guilds))
+    
+    # The first sweep runs right away and clears messages posted while offline;
+    # on_ready fires again after reconnects, so only start the loop once
+    if not sweep_register_channels.is_running():
+        sweep_register_channels.start()
+
+@bot.event
+async def on_message(message):
+    # Keep the registration channel clean by deleting each message shortly after it is posted
+    if message.guild and message.channel.id == get_guild_cache(message.guild)["register"]:
+        await message.delete(delay=REGISTER_DELETE_DELAY)
+
+# Keep the channel/role cache in sync with guild changes
+@bot.event
+async def on_guild_channel_create(channel):
+    cache_guild(channel.guild)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    cache_guild(channel.guild)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if before.name != after.name:
+        cache_guild(after.guild)
+
+@bot.event
+async def on_guild_role_create(role):
+    cache_guild(role.guild)
+
+@bot.event
+async def on_guild_role_delete(role):
+    cache_guild(role.guild)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name:
+        cache_guild(after.guild)
+
+@bot.event
+async def on_user_update(before, after):
+    # Drop the cached avatar URL so it is rebuilt on next use
+    avatar_cache.pop(after.id, None)
 
 @bot.event
 async def on_voice_state_update(member, before, after):
+    # Mute/deafen/stream toggles don't change the channel, nothing to do for those
+    if before.channel == after.channel:
+        return
+    
+    # Moves between non-queue channels need no work
+    joined_num = queue_num_from_vc(after.channel)
+    left_num = queue_num_from_vc(before.channel)
+    if joined_num is None and left_num is None:
+        return
+    
     guild = member.guild
     
     # Handle joining a queue channel
-    if after.channel and after.channel.name.startswith("Queue "):
-        try:
-            queue_num = int(after.channel.name.split(" ")[1])
-            text_channel = discord.utils.get(guild.text_channels, name=f"queue-{queue_num}-chat")
+    if joined_num is not None:
+        queue_num = joined_num
+        text_channel = get_queue_text_channel(guild, queue_num)
+        
+        if not text_channel:
+            return
             
-            if not text_channel:
-                return
-                
-            # Initialize queue if not already done
-            if queue_num not in queues:
-                queues[queue_num] = Queue(queue_num)
-                
-            # Grant chat permissions
-            overwrite = discord.PermissionOverwrite()
-            overwrite.read_messages = True
-            overwrite.send_messages = True
-            await text_channel.set_permissions(member, overwrite=overwrite)
+        # Initialize queue if not already done
+        get_or_create_queue(guild, queue_num)
             
-            # Notify when someone joins the queue voice channel
-            embed = discord.Embed(
-                title="Voice Channel Joined",
-                description=f"{member.mention} has joined the {after.channel.name} channel. Use `/join {queue_num}` to join the queue!",
-                color=INFO_COLOR
-            )
-            embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-            await text_channel.send(embed=embed)
-        except ValueError:
-            pass
+        # Grant chat permissions
+        overwrite = discord.PermissionOverwrite()
+        overwrite.read_messages = True
+        overwrite.send_messages = True
+        schedule_chat_permissions(text_channel, member, overwrite)
+        
+        # Notify when someone joins the queue voice channel
+        embed = TPL_VC_JOINED.copy()
+        embed.description = f"{member.mention} has joined the {after.channel.name} channel. Use `/join {queue_num}` to join the queue!"
+        embed.set_thumbnail(url=avatar_url(member))
+        await text_channel.send(embed=embed)
     
     # Handle leaving a queue channel
-    if before.channel and before.channel.name.startswith("Queue "):
-        try:
-            queue_num = int(before.channel.name.split(" ")[1])
-            text_channel = discord.utils.get(guild.text_channels, name=f"queue-{queue_num}-chat")
-            
-            if not text_channel:
-                return
-                
-            # Remove chat permissions
-            await text_channel.set_permissions(member, overwrite=None)
+    if left_num is not None:
+        queue_num = left_num
+        text_channel = get_queue_text_channel(guild, queue_num)
+        
+        if not text_channel:
+            return
             
-            # Remove player from queue if they leave the voice channel
-            if queue_num in queues and member in queues[queue_num].players:
-                queues[queue_num].players.remove(member)
-                embed = discord.Embed(
-                    title="Queue Update",
-                    description=f"{member.mention} has left {before.channel.name} and was removed from the queue.",
-                    color=WARNING_COLOR
-                )
-                await text_channel.send(embed=embed)
-        except ValueError:
-            pass
+        # Remove chat permissions
+        schedule_chat_permissions(text_channel, member, None)
+        
+        # Remove player from queue if they leave the voice channel
+        queue = get_queue(guild, queue_num)
+        if queue and member.id in queue.players:
+            del queue.players[member.id]
+            embed = TPL_QUEUE_LEFT.copy()
+            embed.description = f"{member.mention} has left {before.channel.name} and was removed from the queue."
+            await text_channel.send(embed=embed)
 
 @bot.slash_command(
     name="register",
     description="Register yourself for the tournament system"
 )
 async def register(ctx):
-    if ctx.channel.name != "com-register":
-        embed = discord.Embed(
-            title="Wrong Channel",
-            description="❌ You can only register in the #com-register channel.",
-            color=WARNING_COLOR
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
+    if ctx.channel.id != get_guild_cache(ctx.guild)["register"]:
+        await ctx.respond("❌ You can only register in the #com-register channel.", ephemeral=True)
         return
 
-    unranked_role = discord.utils.get(ctx.guild.roles, name="UNRANKED")
+    unranked_role = get_unranked_role(ctx.guild)
     if not unranked_role:
-        embed = discord.Embed(
-            title="Role Missing",
-            description="❌ 'UNRANKED' role not found. Please ask an admin to create it.",
-            color=WARNING_COLOR
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
+        await ctx.respond("❌ 'UNRANKED' role not found. Please ask an admin to create it.", ephemeral=True)
         return
 
     if unranked_role in ctx.author.roles:
-        embed = discord.Embed(
-            title="Already Registered",
-            description="✅ You are already registered!",
-            color=INFO_COLOR
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
+        await ctx.respond("✅ You are already registered!", ephemeral=True)
     else:
         await ctx.author.add_roles(unranked_role)
-        embed = discord.Embed(
-            title="Registration Successful",
-            description=f"✅ {ctx.author.mention}, you have been registered and given the UNRANKED role!",
-            color=SUCCESS_COLOR
-        )
+        embed = TPL_REGISTERED.copy()
+        embed.description = f"✅ {ctx.author.mention}, you have been registered and given the UNRANKED role!"
         await ctx.respond(embed=embed, ephemeral=True)
 
 @bot.slash_command(
@@ -310,82 +597,42 @@ async def join(
 ):
     # Get queue number from channel name if not provided
     if queue_num is None:
-        if ctx.channel.name.startswith("queue-") and "-chat" in ctx.channel.name:
-            try:
-                queue_num = int(ctx.channel.name.split("-")[1])
-            except ValueError:
-                embed = discord.Embed(
-                    title="Invalid Queue",
-                    description="❌ Could not determine queue number from channel name.",
-                    color=WARNING_COLOR
-                )
-                await ctx.respond(embed=embed, ephemeral=True)
-                return
-        else:
-            embed = discord.Embed(
-                title="Queue Number Required",
-                description="❌ Please specify a queue number (e.g., `/join 1`).",
-                color=WARNING_COLOR
-            )
-            await ctx.respond(embed=embed, ephemeral=True)
+        queue_num = queue_num_from_channel(ctx.channel)
+        if queue_num is None:
+            await ctx.respond("❌ Please specify a queue number (e.g., `/join 1`).", ephemeral=True)
             return
     
     # Check if we're in the correct channel
     expected_channel = f"queue-{queue_num}-chat"
-    if ctx.channel.name != expected_channel:
-        embed = discord.Embed(
-            title="Wrong Channel",
-            description=f"❌ You can only use this command in the #{expected_channel} channel.",
-            color=WARNING_COLOR
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
+    if queue_num_from_channel(ctx.channel) != queue_num:
+        await ctx.respond(f"❌ You can only use this command in the #{expected_channel} channel.", ephemeral=True)
         return
 
     # Check if user is in the correct voice channel
     voice_state = ctx.author.voice
     expected_vc = f"Queue {queue_num}"
-    if not voice_state or not voice_state.channel or voice_state.channel.name != expected_vc:
-        embed = discord.Embed(
-            title="Not in Voice Channel",
-            description=f"❌ You must be in the **{expected_vc}** voice channel to join this queue.",
-            color=WARNING_COLOR
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
+    if not voice_state or queue_num_from_vc(voice_state.channel) != queue_num:
+        await ctx.respond(f"❌ You must be in the **{expected_vc}** voice channel to join this queue.", ephemeral=True)
         return
     
     # Initialize queue if it doesn't exist
-    if queue_num not in queues:
-        queues[queue_num] = Queue(queue_num)
-    
-    queue = queues[queue_num]
+    queue = get_or_create_queue(ctx.guild, queue_num)
 
-    if ctx.author in queue.players:
-        embed = discord.Embed(
-            title="Already in Queue",
-            description=f"You are already in Queue {queue_num}.",
-            color=INFO_COLOR
-        )
-        await ctx.respond(embed=embed)
+    if ctx.author.id in queue.players:
+        await ctx.respond(f"❌ You are already in Queue {queue_num}.", ephemeral=True)
     elif len(queue.players) >= 10:
-        embed = discord.Embed(
-            title="Queue Full",
-            description=f"Queue {queue_num} is currently full (10/10).",
-            color=WARNING_COLOR
-        )
-        await ctx.respond(embed=embed)
+        await ctx.respond(f"❌ Queue {queue_num} is currently full (10/10).", ephemeral=True)
     else:
-        queue.players.append(ctx.author)
+        queue.players[ctx.author.id] = ctx.author
         
         # Display fancy queue status with progress bar
         progress = len(queue.players)
-        progress_bar = "▰" * progress + "▱" * (10 - progress)
+        progress_bar = PROGRESS_BARS[progress]
         
-        embed = discord.Embed(
-            title=f"Queue {queue_num} Update",
-            description=f"{ctx.author.mention} joined the queue!\n\n**Queue Status:** {progress_bar} ({progress}/10)",
-            color=PRIMARY_COLOR
-        )
-        embed.set_thumbnail(url=ctx.author.avatar.url if ctx.author.avatar else ctx.author.default_avatar.url)
+        embed = TPL_QUEUE_JOINED.copy()
+        embed.title = f"Queue {queue_num} Update"
+        embed.description = f"{ctx.author.mention} joined the queue!\n\n**Queue Status:** {progress_bar} ({progress}/10)"
+        embed.set_thumbnail(url=avatar_url(ctx.author))
         await ctx.respond(embed=embed)
 
     if queue.is_full():
@@ -397,14 +644,298 @@ async def join(
         await ctx.respond(embed=embed)
         await start_captain_voting(ctx, queue_num)
 
+# ==========================================
+# Voting and drafting views
+# ==========================================
+
+class VotingView(View):
+    def __init__(self, queue, queue_num, ctx, timeout=20):
+        super().__init__(timeout=timeout)
+        self.queue = queue
+        self.queue_num = queue_num
+        self.ctx = ctx
+        self.finalized = False
+        
+        # One plain button per player (laid out 5 per row), all handled by _on_vote
+        for p in queue.players.values():
+            button = Button(label=queue.names[p.id], style=discord.ButtonStyle.primary, custom_id=f"vote:{p.id}")
+            button.callback = self._on_vote
+            self.add_item(button)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Only queued players may vote; checked once before any button callback
+        if interaction.user.id in self.queue.players:
+            return True
+        await interaction.response.send_message("❌ You are not in the queue.", ephemeral=True)
+        return False
+
+    async def _on_vote(self, interaction: discord.Interaction):
+        # Acknowledge right away, the confirmation goes out as a followup
+        await interaction.response.defer(ephemeral=True)
+        candidate = self.queue.players.get(int(interaction.data["custom_id"].split(":")[1]))
+        if candidate is None:
+            await interaction.followup.send("❌ That player is no longer in the queue.", ephemeral=True)
+            return
+            
+        # Record vote; voting again replaces the earlier vote
+        changed = interaction.user.id in self.queue.captain_votes
+        self.queue.captain_votes[interaction.user.id] = candidate.id
+        
+        await interaction.followup.send(
+            f"✅ You {'changed your vote to' if changed else 'voted for'} {self.queue.names[candidate.id]}", 
+            ephemeral=True
+        )
+        
+        # Everyone has voted, no need to wait for the timeout
+        if len(self.queue.captain_votes) >= len(self.queue.players):
+            self.stop()
+            await self._finalize()
+
+    async def on_timeout(self):
+        await self._finalize()
+
+    async def _finalize(self):
+        # The vote can end early (everyone voted) or on timeout, only finalize once
+        if self.finalized:
+            return
+        self.finalized = True
+        await finalize_captains(self.ctx, self.queue_num)
+
+class ConfirmSwapView(View):
+    def __init__(self, queue, timeout=30):
+        super().__init__(timeout=timeout)
+        self.queue = queue
+        self.value = None
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id in self.queue.captain_ids:
+            return True
+        await interaction.response.send_message("❌ Only captains can answer a swap request.", ephemeral=True)
+        return False
+        
+    @discord.ui.button(label="Yes", style=discord.ButtonStyle.success)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.value = True
+        self.stop()
+        await interaction.response.send_message("✅ Swap confirmed!", ephemeral=True)
+        
+    @discord.ui.button(label="No", style=discord.ButtonStyle.danger)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.value = False
+        self.stop()
+        await interaction.response.send_message("❌ Swap canceled.", ephemeral=True)
+
+class CaptainSwapView(View):
+    def __init__(self, queue, queue_num, ctx, timeout=30):
+        super().__init__(timeout=timeout)
+        self.queue = queue
+        self.queue_num = queue_num
+        self.ctx = ctx
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id in self.queue.captain_ids:
+            return True
+        await interaction.response.send_message("❌ Only captains can use these buttons.", ephemeral=True)
+        return False
+        
+    @discord.ui.button(label="Swap Captains", style=discord.ButtonStyle.secondary, custom_id="swap_captains")
+    async def swap_captains(self, interaction: discord.Interaction, button: discord.ui.Button):
+        queue = self.queue
+        ctx = self.ctx
+        
+        # Notify the other captain
+        other_captain = queue.captains[1] if interaction.user == queue.captains[0] else queue.captains[0]
+        
+        confirm_embed = discord.Embed(
+            title="Captain Swap Request",
+            description=f"{interaction.user.mention} has requested to swap with a random player instead of being captain. {other_captain.mention}, do you agree?",
+            color=WARNING_COLOR
+        )
+        
+        view = ConfirmSwapView(queue)
+        message = await ctx.send(embed=confirm_embed, view=view)
+        await view.wait()
+        
+        if view.value:
+            # Perform the swap - replace the captain with a random player
+            remaining_players = [p for uid, p in queue.players.items() if uid not in queue.captain_ids]
+            if not remaining_players:
+                await ctx.send("❌ No players available for swap.")
+                return
+            
+            new_captain = random.choice(remaining_players)
+            old_captain_index = 0 if interaction.user == queue.captains[0] else 1
+            
+            # Update captains; the old captain goes back into the pick pool
+            old_captain = queue.captains[old_captain_index]
+            queue.captains[old_captain_index] = new_captain
+            queue.captain_ids.discard(old_captain.id)
+            queue.captain_ids.add(new_captain.id)
+            
+            swap_complete_embed = discord.Embed(
+                title="Captain Swap Complete",
+                description=f"{interaction.user.mention} has been replaced with {new_captain.mention} as captain!",
+                color=SUCCESS_COLOR
+            )
+            
+            # Update captain display
+            captain_display_embed = discord.Embed(
+                title="🏆 Updated Team Captains",
+                description="The team captains are now:",
+                color=SUCCESS_COLOR
+            )
+            
+            captain_display_embed.add_field(
+                name="Team A Captain",
+                value=f"{queue.captains[0].mention} ({queue.names[queue.captains[0].id]})",
+                inline=True
+            )
+            
+            captain_display_embed.add_field(
+                name="Team B Captain",
+                value=f"{queue.captains[1].mention} ({queue.names[queue.captains[1].id]})",
+                inline=True
+            )
+            
+            # Announce the swap and delete the confirmation message concurrently
+            await asyncio.gather(
+                ctx.send(embeds=[swap_complete_embed, captain_display_embed]),
+                message.delete()
+            )
+        else:
+            await message.edit(content="Swap request declined.", embed=None, view=None)
+            
+    @discord.ui.button(label="Continue", style=discord.ButtonStyle.primary, custom_id="continue_picking")
+    async def continue_to_picks(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.send_message("✅ Continuing to player selection!", ephemeral=True)
+        
+        # Start player picks
+        await pick_players(self.ctx, self.queue_num)
+
+class PlayerSelect(Select):
+    def __init__(self):
+        # Options are filled in by set_players at the start of every turn
+        super().__init__(placeholder="Select a player...")
+
+    def set_players(self, players, names):
+        """Refill the dropdown with the players still available"""
+        self.options = [discord.SelectOption(label=names[p.id], value=str(p.id)) for p in players]
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        self.view.selected_id = int(self.values[0])
+        await interaction.followup.send("✅ Player selected. Click the button to confirm.", ephemeral=True)
+
+class ConfirmButton(Button):
+    def __init__(self):
+        super().__init__(label="Select", style=discord.ButtonStyle.success)
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        view = self.view
+        queue = view.queue
+        
+        # Options carry member IDs, so a stale dropdown can't pick someone already taken
+        pick = next((p for p in view.remaining if p.id == view.selected_id), None)
+        if pick is None:
+            await interaction.followup.send("❌ Select an available player first.", ephemeral=True)
+            return
+        
+        view.remaining.remove(pick)
+        view.teams[view.team_index].append(pick)
+        queue.current_pick_index += 1
+        view.pick_event.set()
+        pick_name = queue.names[pick.id]
+        await interaction.followup.send(f"✅ You picked **{pick_name}**.", ephemeral=True)
+            
+        # Create a nice embed for the pick
+        pick_embed = discord.Embed(
+            title="Player Picked",
+            description=f"✅ **{pick_name}** was picked by {queue.names[interaction.user.id]}",
+            color=SUCCESS_COLOR
+        )
+        
+        # Add player avatar
+        pick_embed.set_thumbnail(url=avatar_url(pick))
+        
+        await view.ctx.send(embed=pick_embed)
+
+class PickView(View):
+    """Draft controls shared by every pick; pick_players advances the turn"""
+    def __init__(self, ctx, queue, remaining):
+        self.select = PlayerSelect()
+        super().__init__(self.select, ConfirmButton(), timeout=None)
+        self.ctx = ctx
+        self.queue = queue
+        self.remaining = remaining
+        self.teams = (queue.team1, queue.team2)
+        self.team_index = 0
+        self.current_captain = None
+        self.selected_id = None
+        self.pick_event = asyncio.Event()
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Only the captain whose turn it is may use the draft controls
+        if self.current_captain is not None and interaction.user.id == self.current_captain.id:
+            return True
+        await interaction.response.send_message("❌ It's not your turn.", ephemeral=True)
+        return False
+
+    def next_turn(self, team_index, captain):
+        """Hand the draft to a team's captain and reset the selection"""
+        self.team_index = team_index
+        self.current_captain = captain
+        self.selected_id = None
+        self.select.set_players(self.remaining, self.queue.names)
+        self.pick_event.clear()
+
+class MapVoteButton(Button):
+    def __init__(self, queue, map_name):
+        super().__init__(label=map_name, style=discord.ButtonStyle.secondary)
+        self.queue = queue
+        self.map_name = map_name
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        queue = self.queue
+        if interaction.user.id in queue.voted_players:
+            await interaction.followup.send("❌ You have already voted.", ephemeral=True)
+            return
+
+        queue.map_votes[self.map_name] = queue.map_votes.get(self.map_name, 0) + 1
+        queue.voted_players.add(interaction.user.id)
+        await interaction.followup.send(f"✅ You voted for map **{self.map_name}**.", ephemeral=True)
+        
+        if len(queue.voted_players) >= len(queue.players):
+            self.view.stop()
+            await finalize_map_vote(self.view.ctx, self.view.queue_num)
+
+class MapVotingView(View):
+    def __init__(self, queue, ctx, queue_num, timeout=20):
+        super().__init__(*(MapVoteButton(queue, m) for m in MAP_POOL), timeout=timeout)
+        self.queue = queue
+        self.ctx = ctx
+        self.queue_num = queue_num
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id in self.queue.players:
+            return True
+        await interaction.response.send_message("❌ You are not in the queue.", ephemeral=True)
+        return False
+
+    async def on_timeout(self):
+        await finalize_map_vote(self.ctx, self.queue_num)
+
 async def start_captain_voting(ctx, queue_num):
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-        
-    queue = queues[queue_num]
+
     queue.captain_votes.clear()
+    queue.snapshot_names()
 
     # Create an embed for voting
     embed = discord.Embed(
@@ -414,64 +945,25 @@ async def start_captain_voting(ctx, queue_num):
     )
     embed.add_field(name="How to Vote", value="Click on a player's button below to cast your vote.", inline=False)
     embed.add_field(name="Time Remaining", value="You have 20 seconds to vote!", inline=False)
-    embed.set_footer(text="You can only vote once")
-
-    class VoteButton(Button):
-        def __init__(self, player):
-            super().__init__(
-                label=player.display_name, 
-                style=discord.ButtonStyle.primary,
-                custom_id=f"vote_{player.id}"
-            )
-            self.player = player
-
-        async def callback(self, interaction: discord.Interaction):
-            if interaction.user not in queue.players:
-                await interaction.response.send_message("❌ You are not in the queue.", ephemeral=True)
-                return
-                
-            # Check if user already voted
-            for voter, candidate in list(getattr(self.view, 'votes', {}).items()):
-                if voter == interaction.user:
-                    await interaction.response.send_message(f"❌ You already voted for {candidate.display_name}", ephemeral=True)
-                    return
-
-            # Record vote
-            queue.captain_votes[self.player] += 1
-            if not hasattr(self.view, 'votes'):
-                self.view.votes = {}
-            self.view.votes[interaction.user] = self.player
-            
-            await interaction.response.send_message(
-                f"✅ You voted for {self.player.display_name}", 
-                ephemeral=True
-            )
-
-    class VotingView(View):
-        def __init__(self, timeout=20):
-            super().__init__(timeout=timeout)
-            self.votes = {}
-            
-            # Create a row of buttons, 5 per row maximum
-            for i, p in enumerate(queue.players):
-                self.add_item(VoteButton(p))
-
-        async def on_timeout(self):
-            await finalize_captains(ctx, queue_num)
+    embed.set_footer(text="You can change your vote until time runs out")
 
-    await ctx.send(embed=embed, view=VotingView())
+    await ctx.send(embed=embed, view=VotingView(queue, queue_num, ctx))
 
 async def finalize_captains(ctx, queue_num):
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-        
-    queue = queues[queue_num]
-    vote_counts = queue.captain_votes
+    
+    # Players may have left or joined during the vote
+    queue.snapshot_names()
+    
+    # Tally one vote per voter, skipping candidates who have since left the queue
+    vote_counts = Counter(cid for cid in queue.captain_votes.values() if cid in queue.players)
     
     if len(vote_counts) < 2:
-        chosen = random.sample(queue.players, 2)
+        chosen = random.sample(list(queue.players.values()), 2)
         
         embed = discord.Embed(
             title=f"Queue {queue_num} - Random Captain Selection",
@@ -479,10 +971,12 @@ async def finalize_captains(ctx, queue_num):
             color=WARNING_COLOR
         )
     else:
-        chosen = [player for player, _ in vote_counts.most_common(2)]
+        # Candidates are counted by ID and only resolved to members for the top two
+        ranked = vote_counts.most_common()
+        chosen = [queue.players[cid] for cid, _ in ranked[:2]]
         
         # Create vote results display
-        vote_results = "\n".join([f"{player.display_name}: {count} votes" for player, count in vote_counts.most_common()])
+        vote_results = "\n".join(f"{queue.names[cid]}: {count} votes" for cid, count in ranked)
         
         embed = discord.Embed(
             title=f"Queue {queue_num} - Captain Selection Results",
@@ -493,6 +987,7 @@ async def finalize_captains(ctx, queue_num):
 
     queue.captains.clear()
     queue.captains.extend(chosen)
+    queue.captain_ids = {captain.id for captain in chosen}
     
     # Create embeds for captains
     captain_embed = discord.Embed(
@@ -503,13 +998,13 @@ async def finalize_captains(ctx, queue_num):
     
     captain_embed.add_field(
         name="Team A Captain",
-        value=f"{queue.captains[0].mention} ({queue.captains[0].display_name})",
+        value=f"{queue.captains[0].mention} ({queue.names[queue.captains[0].id]})",
         inline=True
     )
     
     captain_embed.add_field(
         name="Team B Captain",
-        value=f"{queue.captains[1].mention} ({queue.captains[1].display_name})",
+        value=f"{queue.captains[1].mention} ({queue.names[queue.captains[1].id]})",
         inline=True
     )
     
@@ -521,130 +1016,19 @@ async def finalize_captains(ctx, queue_num):
             if field.name != "Team A Captain" and field.name != "Team B Captain":
                 captain_embed.add_field(name=field.name, value=field.value, inline=field.inline)
     
-    # Create buttons for captain swap
-    class CaptainSwapView(View):
-        def __init__(self, timeout=30):
-            super().__init__(timeout=timeout)
-            
-        @discord.ui.button(label="Swap Captains", style=discord.ButtonStyle.secondary, custom_id="swap_captains")
-        async def swap_captains(self, interaction: discord.Interaction, button: discord.ui.Button):
-            if interaction.user not in queue.captains:
-                await interaction.response.send_message("❌ Only captains can request a swap.", ephemeral=True)
-                return
-            
-            # Create confirmation buttons
-            class ConfirmSwapView(View):
-                def __init__(self, timeout=30):
-                    super().__init__(timeout=timeout)
-                    self.value = None
-                    
-                @discord.ui.button(label="Yes", style=discord.ButtonStyle.success)
-                async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-                    if interaction.user != queue.captains[0] and interaction.user != queue.captains[1]:
-                        await interaction.response.send_message("❌ Only captains can confirm.", ephemeral=True)
-                        return
-                        
-                    self.value = True
-                    self.stop()
-                    await interaction.response.send_message("✅ Swap confirmed!", ephemeral=True)
-                    
-                @discord.ui.button(label="No", style=discord.ButtonStyle.danger)
-                async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-                    if interaction.user != queue.captains[0] and interaction.user != queue.captains[1]:
-                        await interaction.response.send_message("❌ Only captains can cancel.", ephemeral=True)
-                        return
-                        
-                    self.value = False
-                    self.stop()
-                    await interaction.response.send_message("❌ Swap canceled.", ephemeral=True)
-            
-            # Notify the other captain
-            other_captain = queue.captains[1] if interaction.user == queue.captains[0] else queue.captains[0]
-            
-            confirm_embed = discord.Embed(
-                title="Captain Swap Request",
-                description=f"{interaction.user.mention} has requested to swap with a random player instead of being captain. {other_captain.mention}, do you agree?",
-                color=WARNING_COLOR
-            )
-            
-            view = ConfirmSwapView()
-            message = await ctx.send(embed=confirm_embed, view=view)
-            await view.wait()
-            
-            if view.value:
-                # Perform the swap - replace the captain with a random player
-                remaining_players = [p for p in queue.players if p not in queue.captains]
-                if not remaining_players:
-                    await ctx.send("❌ No players available for swap.")
-                    return
-                
-                new_captain = random.choice(remaining_players)
-                old_captain_index = 0 if interaction.user == queue.captains[0] else 1
-                
-                # Remove new captain from remaining players and add old captain
-                queue.players.remove(new_captain)
-                queue.players.append(queue.captains[old_captain_index])
-                
-                # Update captains list
-                queue.captains[old_captain_index] = new_captain
-                
-                swap_complete_embed = discord.Embed(
-                    title="Captain Swap Complete",
-                    description=f"{interaction.user.mention} has been replaced with {new_captain.mention} as captain!",
-                    color=SUCCESS_COLOR
-                )
-                
-                # Update captain display
-                captain_display_embed = discord.Embed(
-                    title="🏆 Updated Team Captains",
-                    description="The team captains are now:",
-                    color=SUCCESS_COLOR
-                )
-                
-                captain_display_embed.add_field(
-                    name="Team A Captain",
-                    value=f"{queue.captains[0].mention} ({queue.captains[0].display_name})",
-                    inline=True
-                )
-                
-                captain_display_embed.add_field(
-                    name="Team B Captain",
-                    value=f"{queue.captains[1].mention} ({queue.captains[1].display_name})",
-                    inline=True
-                )
-                
-                await ctx.send(embed=swap_complete_embed)
-                await ctx.send(embed=captain_display_embed)
-                
-                # Delete the confirmation message
-                await message.delete()
-            else:
-                await message.edit(content="Swap request declined.", embed=None, view=None)
-                
-        @discord.ui.button(label="Continue", style=discord.ButtonStyle.primary, custom_id="continue_picking")
-        async def continue_to_picks(self, interaction: discord.Interaction, button: discord.ui.Button):
-            if interaction.user not in queue.captains:
-                await interaction.response.send_message("❌ Only captains can continue to picks.", ephemeral=True)
-                return
-                
-            self.stop()
-            await interaction.response.send_message("✅ Continuing to player selection!", ephemeral=True)
-            
-            # Start player picks
-            await pick_players(ctx, queue_num)
-    
     # Send the captain selection message with swap option
-    await ctx.send(embed=captain_embed, view=CaptainSwapView())
+    await ctx.send(embed=captain_embed, view=CaptainSwapView(queue, queue_num, ctx))
 
 async def pick_players(ctx, queue_num):
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-    
-    queue = queues[queue_num]
-    remaining = [p for p in queue.players if p not in queue.captains]
-    turn_order = [queue.captains[0], queue.captains[1], queue.captains[1], queue.captains[0], queue.captains[0], queue.captains[1], queue.captains[0]]
+
+    # The queue may have changed since the vote, e.g. a /join on a full queue restarting it
+    queue.snapshot_names()
+    remaining = [p for uid, p in queue.players.items() if uid not in queue.captain_ids]
     queue.current_pick_index = 0
     
     # Initialize teams with captains
@@ -652,22 +1036,21 @@ async def pick_players(ctx, queue_num):
     queue.team2.clear()
     queue.team1.append(queue.captains[0])
     queue.team2.append(queue.captains[1])
+    
+    # One view drives the whole draft; ConfirmButton sets its event when a pick is made
+    view = PickView(ctx, queue, remaining)
+    select_embed = discord.Embed(
+        title="Select Player",
+        description="Use the dropdown menu to select a player and confirm your pick.",
+        color=PRIMARY_COLOR
+    )
 
-    async def prompt_next_pick():
-        if queue.current_pick_index >= len(turn_order):
-            # Handle last player
-            last_player = remaining[0]
-            if len(queue.team1) < len(queue.team2):
-                queue.team1.append(last_player)
-            else:
-                queue.team2.append(last_player)
-                
-            # Display final team rosters before map voting
-            await display_teams(ctx, queue_num)
-            await start_map_voting(ctx, queue_num)
-            return
+    # (team index, picking captain) for every turn of the draft
+    turn_order = tuple((team_index, queue.captains[team_index]) for team_index in TEAM_ORDER)
 
-        current_captain = turn_order[queue.current_pick_index]
+    while queue.current_pick_index < len(turn_order):
+        team_index, current_captain = turn_order[queue.current_pick_index]
+        view.next_turn(team_index, current_captain)
         
         # Create modern embed for player selection
         pick_embed = discord.Embed(
@@ -677,8 +1060,9 @@ async def pick_players(ctx, queue_num):
         )
         
         # Show current team compositions
-        team1_players = ", ".join([p.display_name for p in queue.team1]) or "None"
-        team2_players = ", ".join([p.display_name for p in queue.team2]) or "None"
+        names = queue.names
+        team1_players = ", ".join(names[p.id] for p in queue.team1) or "None"
+        team2_players = ", ".join(names[p.id] for p in queue.team2) or "None"
         
         pick_embed.add_field(
             name=f"Team A ({len(queue.team1)}/5)",
@@ -693,88 +1077,42 @@ async def pick_players(ctx, queue_num):
         )
         
         # Show remaining players
-        remaining_players = ", ".join([p.display_name for p in remaining])
+        remaining_players = ", ".join(names[p.id] for p in remaining)
         pick_embed.add_field(
             name="Remaining Players",
             value=remaining_players,
             inline=False
         )
         
-        await ctx.send(embed=pick_embed)
-
-        class PlayerSelect(Select):
-            def __init__(self):
-                options = [
-                    discord.SelectOption(label=p.display_name, value=str(i))
-                    for i, p in enumerate(remaining)
-                ]
-                super().__init__(placeholder="Select a player...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                if interaction.user != current_captain:
-                    await interaction.response.send_message("❌ It's not your turn.", ephemeral=True)
-                    return
-                self.view.selected_index = int(self.values[0])
-                await interaction.response.send_message("✅ Player selected. Click the button to confirm.", ephemeral=True)
-
-        class ConfirmButton(Button):
-            def __init__(self):
-                super().__init__(label="Select", style=discord.ButtonStyle.success)
-
-            async def callback(self, interaction: discord.Interaction):
-                if interaction.user != current_captain:
-                    await interaction.response.send_message("❌ You can't confirm this pick.", ephemeral=True)
-                    return
-                index = self.view.selected_index
-                pick = remaining.pop(index)
-                if current_captain == queue.captains[0]:
-                    queue.team1.append(pick)
-                else:
-                    queue.team2.append(pick)
-                    
-                # Create a nice embed for the pick
-                pick_embed = discord.Embed(
-                    title="Player Picked",
-                    description=f"✅ **{pick.display_name}** was picked by {current_captain.display_name}",
-                    color=SUCCESS_COLOR
-                )
-                
-                # Add player avatar if available
-                if pick.avatar:
-                    pick_embed.set_thumbnail(url=pick.avatar.url)
-                
-                await ctx.send(embed=pick_embed)
-                self.view.stop()
-
-        class PickView(View):
-            def __init__(self):
-                super().__init__(timeout=30)
-                self.selected_index = None
-                self.add_item(PlayerSelect())
-                self.add_item(ConfirmButton())
-
-        view = PickView()
+        # Both embeds go out in one message so the turn costs a single request
+        await ctx.send(embeds=[pick_embed, select_embed], view=view)
         
-        select_embed = discord.Embed(
-            title="Select Player",
-            description="Use the dropdown menu to select a player and confirm your pick.",
-            color=PRIMARY_COLOR
-        )
-        await ctx.send(embed=select_embed, view=view)
-        await view.wait()
-        queue.current_pick_index += 1
-        await prompt_next_pick()
-
-    await prompt_next_pick()
+        try:
+            await asyncio.wait_for(view.pick_event.wait(), timeout=30)
+        except asyncio.TimeoutError:
+            # Captain ran out of time, their turn is skipped
+            queue.current_pick_index += 1
+    
+    view.stop()
+    
+    # Handle last player
+    last_player = remaining[0]
+    if len(queue.team1) < len(queue.team2):
+        queue.team1.append(last_player)
+    else:
+        queue.team2.append(last_player)
+        
+    # Display final team rosters before map voting
+    await display_teams(ctx, queue_num)
+    await start_map_voting(ctx, queue_num)
 
 async def display_teams(ctx, queue_num):
     """Display the final team compositions with a modern UI"""
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-        
-    queue = queues[queue_num]
     
     team_embed = discord.Embed(
         title=f"Queue {queue_num} - 🎮 Final Team Compositions",
@@ -782,34 +1120,21 @@ async def display_teams(ctx, queue_num):
         color=SUCCESS_COLOR
     )
     
-    # Get points for all players
-    team1_points = {}
-    team2_points = {}
-    
-    # Fetch player points in parallel for better performance
-    for player in queue.team1:
-        points = await db.get_player_points(player.id)
-        team1_points[player.id] = points
-        
-    for player in queue.team2:
-        points = await db.get_player_points(player.id)
-        team2_points[player.id] = points
-        
-    # Format team A with captain first and show points
-    team_a_captain = queue.team1[0]
-    team_a_members = "\n".join([
-        f"👑 **{p.display_name}** [{team1_points[p.id]}] (Captain)" if p == team_a_captain 
-        else f"• **{p.display_name}** [{team1_points[p.id]}]"
-        for p in queue.team1
-    ])
-    
-    # Format team B with captain first and show points
-    team_b_captain = queue.team2[0]
-    team_b_members = "\n".join([
-        f"👑 **{p.display_name}** [{team2_points[p.id]}] (Captain)" if p == team_b_captain 
-        else f"• **{p.display_name}** [{team2_points[p.id]}]"
-        for p in queue.team2
-    ])
+    # Get points for all players in a single query
+    points = await db.get_players_points(p.id for p in chain(queue.team1, queue.team2))
+        
+    # Format each team with its captain (always first) flagged and show points
+    def format_team(team):
+        if not team:
+            return "None"
+        captain = team[0]
+        names = queue.names
+        lines = [f"👑 **{names[captain.id]}** [{points[captain.id]}] (Captain)"]
+        lines.extend(f"• **{names[p.id]}** [{points[p.id]}]" for p in team[1:])
+        return "\n".join(lines)
+    
+    team_a_members = format_team(queue.team1)
+    team_b_members = format_team(queue.team2)
     
     team_embed.add_field(
         name="🔵 Team A",
@@ -834,13 +1159,14 @@ async def display_teams(ctx, queue_num):
 
 async def start_map_voting(ctx, queue_num):
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-        
-    queue = queues[queue_num]
+
     queue.map_votes.clear()
     queue.voted_players.clear()
+    queue.map_vote_finalized = False
 
     # Create map voting embed
     map_embed = discord.Embed(
@@ -851,7 +1177,7 @@ async def start_map_voting(ctx, queue_num):
     
     map_embed.add_field(
         name="Available Maps",
-        value="\n".join([f"• {m}" for m in map_pool]),
+        value=AVAILABLE_MAPS_TEXT,
         inline=False
     )
     
@@ -863,45 +1189,24 @@ async def start_map_voting(ctx, queue_num):
     
     map_embed.set_footer(text="You can only vote once")
 
-    class MapVoteButton(Button):
-        def __init__(self, map_name):
-            super().__init__(label=map_name, style=discord.ButtonStyle.secondary)
-            self.map_name = map_name
-
-        async def callback(self, interaction: discord.Interaction):
-            if interaction.user not in queue.players:
-                await interaction.response.send_message("❌ You are not in the queue.", ephemeral=True)
-                return
-
-            if interaction.user in queue.voted_players:
-                await interaction.response.send_message("❌ You have already voted.", ephemeral=True)
-                return
-
-            queue.map_votes[self.map_name] += 1
-            queue.voted_players.add(interaction.user)
-            await interaction.response.send_message(f"✅ You voted for map **{self.map_name}**.", ephemeral=True)
-
-    class MapVotingView(View):
-        def __init__(self, timeout=20):
-            super().__init__(timeout=timeout)
-            for m in map_pool:
-                self.add_item(MapVoteButton(m))
-
-        async def on_timeout(self):
-            await finalize_map_vote(ctx, queue_num)
-
-    await ctx.send(embed=map_embed, view=MapVotingView())
+    await ctx.send(embed=map_embed, view=MapVotingView(queue, ctx, queue_num))
 
 async def finalize_map_vote(ctx, queue_num):
     # Get the queue
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         await ctx.send(f"❌ Queue {queue_num} does not exist.")
         return
-        
-    queue = queues[queue_num]
+    
+    # The vote can end early (everyone voted) or on timeout, only finalize once
+    if queue.map_vote_finalized:
+        return
+    queue.map_vote_finalized = True
+    
     vote_counts = queue.map_votes
     if not vote_counts:
-        chosen_map = random.choice(map_pool)
+        chosen_map = random.choice(MAP_POOL)
+        queue.chosen_map = chosen_map
         
         result_embed = discord.Embed(
             title="Random Map Selection",
@@ -913,16 +1218,14 @@ async def finalize_map_vote(ctx, queue_num):
             value=f"**{chosen_map}**",
             inline=False
         )
-        
-        await ctx.send(embed=result_embed)
     else:
-        top_votes = vote_counts.most_common()
-        highest = top_votes[0][1]
-        top_maps = [m for m, v in top_votes if v == highest]
+        highest = max(vote_counts.values())
+        top_maps = [m for m, v in vote_counts.items() if v == highest]
         chosen_map = random.choice(top_maps)
         queue.chosen_map = chosen_map
         
         # Create vote results display
+        top_votes = sorted(vote_counts.items(), key=lambda kv: kv[1], reverse=True)
         vote_results = "\n".join([f"**{map_name}**: {count} votes" for map_name, count in top_votes])
         
         result_embed = discord.Embed(
@@ -942,12 +1245,10 @@ async def finalize_map_vote(ctx, queue_num):
             value=vote_results, 
             inline=False
         )
-        
-        await ctx.send(embed=result_embed)
 
     guild = ctx.guild
-    team1_vc = discord.utils.get(guild.voice_channels, name=queue.team1_vc_name)
-    team2_vc = discord.utils.get(guild.voice_channels, name=queue.team2_vc_name)
+    team1_vc = get_vc(guild, queue.team1_vc_name)
+    team2_vc = get_vc(guild, queue.team2_vc_name)
 
     # Check if the voice channels exist
     if not team1_vc or not team2_vc:
@@ -956,29 +1257,29 @@ async def finalize_map_vote(ctx, queue_num):
             description=f"❌ Could not find {queue.team1_vc_name} or {queue.team2_vc_name} voice channels. Please ask an admin to create them.",
             color=WARNING_COLOR
         )
-        await ctx.send(embed=error_embed)
+        await ctx.send(embeds=[result_embed, error_embed])
         return
 
-    # Set permissions for voice channels
-    for vc in [team1_vc, team2_vc]:
-        await vc.set_permissions(guild.default_role, connect=False)
-
-    # Move players to their team voice channels
-    for p in queue.team1:
-        await team1_vc.set_permissions(p, connect=True)
-        if p.voice and p.voice.channel:
-            try:
-                await p.move_to(team1_vc)
-            except discord.HTTPException:
-                pass
-                
-    for p in queue.team2:
-        await team2_vc.set_permissions(p, connect=True)
-        if p.voice and p.voice.channel:
-            try:
-                await p.move_to(team2_vc)
-            except discord.HTTPException:
-                pass
+    # Set permissions for both voice channels at once, one edit per channel
+    channels = ((team1_vc, queue.team1), (team2_vc, queue.team2))
+    edits = []
+    for vc, team in channels:
+        overwrites = dict(vc.overwrites)
+        overwrites[guild.default_role] = discord.PermissionOverwrite(connect=False)
+        for p in team:
+            overwrites[p] = discord.PermissionOverwrite(connect=True)
+        edits.append(with_rate_limit_retry(vc.edit, overwrites=overwrites))
+    
+    for (vc, _), result in zip(channels, await asyncio.gather(*edits, return_exceptions=True)):
+        if isinstance(result, Exception):
+            logger.error(f"Error setting permissions on {vc.name}: {result}")
+
+    # Move players to their team voice channels concurrently
+    moves = [(p, vc) for vc, team in ((team1_vc, queue.team1), (team2_vc, queue.team2)) for p in team if p.voice and p.voice.channel]
+    results = await asyncio.gather(*(with_rate_limit_retry(p.move_to, vc) for p, vc in moves), return_exceptions=True)
+    for (p, vc), result in zip(moves, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not move {p.display_name} to {vc.name}: {result}")
                 
     # Final message
     final_embed = discord.Embed(
@@ -988,6 +1289,9 @@ async def finalize_map_vote(ctx, queue_num):
     )
     final_embed.set_footer(text="Good luck and have fun!")
     
+    # Vote results, match tracking info and the final message go out as one message
+    embeds = [result_embed]
+    
     # Create match entry in database
     match_id = await db.create_match(queue_num, queue.captains[0], queue.captains[1], chosen_map)
     if match_id:
@@ -1000,24 +1304,22 @@ async def finalize_map_vote(ctx, queue_num):
             description=f"This match has been registered with ID: **{match_id}**\n\nTo report results, use:\n`/win team1` or `/win team2`",
             color=INFO_COLOR
         )
-        await ctx.send(embed=match_info_embed)
+        embeds.append(match_info_embed)
     
-    await ctx.send(embed=final_embed)
+    embeds.append(final_embed)
+    await ctx.send(embeds=embeds)
 
 @bot.slash_command(
     name="resetqueue",
     description="Reset a specific queue (Admin only)"
 )
-@permissions.has_any_role("Owner", "COM MODERATOR", "COM ADMIN", "COM CAPTAIN")
+@permissions.has_any_role(*ADMIN_ROLES)
 async def resetqueue(
     ctx,
     queue_num: Option(int, "Queue number to reset", required=False, default=None)
 ):
     # Permission check is handled by the decorator, but we'll keep it for extra safety
-    allowed_roles = ["Owner", "COM MODERATOR", "COM ADMIN", "COM CAPTAIN"]
-    user_roles = [role.name for role in ctx.author.roles]
-
-    if not any(role in user_roles for role in allowed_roles):
+    if ADMIN_ROLES.isdisjoint(role.name for role in ctx.author.roles):
         embed = discord.Embed(
             title="Permission Error",
             description="❌ You do not have the required role to use this command.",
@@ -1028,18 +1330,8 @@ async def resetqueue(
     
     # If no queue number is provided, get it from the channel name
     if queue_num is None:
-        if ctx.channel.name.startswith("queue-") and "-chat" in ctx.channel.name:
-            try:
-                queue_num = int(ctx.channel.name.split("-")[1])
-            except ValueError:
-                embed = discord.Embed(
-                    title="Invalid Queue",
-                    description="❌ Could not determine queue number from channel name. Please specify a queue number.",
-                    color=WARNING_COLOR
-                )
-                await ctx.send(embed=embed, delete_after=5)
-                return
-        else:
+        queue_num = queue_num_from_channel(ctx.channel)
+        if queue_num is None:
             embed = discord.Embed(
                 title="Queue Number Required",
                 description="❌ Please specify a queue number (e.g., `/resetqueue 1`).",
@@ -1049,8 +1341,9 @@ async def resetqueue(
             return
     
     # Reset the specified queue
-    if queue_num in queues:
-        queues[queue_num].reset()
+    queue = get_queue(ctx.guild, queue_num)
+    if queue:
+        queue.reset()
         embed = discord.Embed(
             title=f"Queue {queue_num} Reset",
             description=f"✅ Queue {queue_num} has been reset successfully. Players can now join again.",
@@ -1075,18 +1368,8 @@ async def queue(
 ):
     # If no queue number is provided, get it from the channel name
     if queue_num is None:
-        if ctx.channel.name.startswith("queue-") and "-chat" in ctx.channel.name:
-            try:
-                queue_num = int(ctx.channel.name.split("-")[1])
-            except ValueError:
-                embed = discord.Embed(
-                    title="Invalid Queue",
-                    description="❌ Could not determine queue number from channel name. Please specify a queue number.",
-                    color=WARNING_COLOR
-                )
-                await ctx.respond(embed=embed, ephemeral=True)
-                return
-        else:
+        queue_num = queue_num_from_channel(ctx.channel)
+        if queue_num is None:
             embed = discord.Embed(
                 title="Queue Number Required",
                 description="❌ Please specify a queue number (e.g., `/queue 1`).",
@@ -1096,7 +1379,8 @@ async def queue(
             return
     
     # Show queue status
-    if queue_num not in queues or not queues[queue_num].players:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None or not queue.players:
         embed = discord.Embed(
             title=f"Queue {queue_num} Status",
             description=f"❌ Queue {queue_num} is currently empty.",
@@ -1104,12 +1388,11 @@ async def queue(
         )
         await ctx.respond(embed=embed)
     else:
-        queue = queues[queue_num]
         # Create a progress bar
         progress = len(queue.players)
-        progress_bar = "▰" * progress + "▱" * (10 - progress)
+        progress_bar = PROGRESS_BARS[progress]
         
-        queue_list = "\n".join([f"{i+1}. {member.display_name}" for i, member in enumerate(queue.players)])
+        queue_list = "\n".join(f"{i}. {member.display_name}" for i, member in enumerate(queue.players.values(), 1))
         
         embed = discord.Embed(
             title=f"Queue {queue_num} Status",
@@ -1130,50 +1413,7 @@ async def queue(
     description="Show available bot commands and their usage"
 )
 async def help_command(ctx):
-    embed = discord.Embed(
-        title="Tournament Bot Commands",
-        description="These are the available commands for the tournament bot:",
-        color=PRIMARY_COLOR
-    )
-    
-    embed.add_field(
-        name="Player Commands",
-        value="""
-🔹 `/register` – Register yourself for the game.
-🔹 `/join [queue_number]` – Join the queue (must be in the corresponding voice channel).
-🔹 `/queue [queue_number]` – View the status of a specific queue.
-🔹 `/queues` – Show all active queues and their status.
-🔹 `/score [@user]` – View your own or another player's statistics.
-🔹 `/leaderboard` – Show the top players by points.
-🔹 `/stats [queue_number]` – View statistics for a specific queue.
-🔹 `/help` – Show this help message.
-""",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="Admin Commands",
-        value="""
-🔹 `/resetqueue [queue_number]` – Reset a specific queue (Admins only).
-🔹 `/win [team]` – Report match results and update player points (Admins only).
-""",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="Queue System",
-        value="""
-• Each queue has its own voice channel (named "Queue 1", "Queue 2", etc.)
-• Each queue has its own text channel (named "queue-1-chat", "queue-2-chat", etc.)
-• Team voice channels are created automatically as "Team 1A", "Team 1B", "Team 2A", "Team 2B", etc.
-• You must be in the voice channel to join its queue
-""",
-        inline=False
-    )
-    
-    embed.set_footer(text="Made for tournament management")
-    
-    await ctx.respond(embed=embed)
+    await ctx.respond(embed=HELP_EMBED)
 
 # Make sure to replace with your actual bot token
 # Status command to show active queues
@@ -1182,7 +1422,8 @@ async def help_command(ctx):
     description="Show all active queues and their status"
 )
 async def queues_command(ctx):
-    if not queues:
+    guild_qs = guild_queues(ctx.guild)
+    if not guild_qs:
         embed = discord.Embed(
             title="No Active Queues",
             description="There are currently no active queues.",
@@ -1197,10 +1438,9 @@ async def queues_command(ctx):
         color=PRIMARY_COLOR
     )
     
-    for queue_num, queue in sorted(queues.items()):
+    for queue_num, queue in sorted(guild_qs.items()):
         player_count = len(queue.players)
-        progress_bar = "▰" * player_count + "▱" * (10 - player_count)
-        status = f"{progress_bar} ({player_count}/10)"
+        status = f"{PROGRESS_BARS[player_count]} ({player_count}/10)"
         
         if queue.captains:
             # Queue is in team selection or game phase
@@ -1233,6 +1473,9 @@ async def score_command(
 ):
     if member is None:
         member = ctx.author
+    
+    # Acknowledge right away so a slow query can't miss the 3s interaction deadline
+    await ctx.defer()
         
     # Get player stats from database
     stats = await db.get_player_stats(member.id)
@@ -1243,7 +1486,7 @@ async def score_command(
             description=f"{member.display_name} has not played any matches yet.",
             color=WARNING_COLOR
         )
-        await ctx.respond(embed=embed)
+        await ctx.followup.send(embed=embed)
         return
         
     # Calculate win rate
@@ -1262,18 +1505,18 @@ async def score_command(
     embed.add_field(name="Wins", value=str(stats['wins']), inline=True)
     embed.add_field(name="Win Rate", value=f"{win_rate:.1f}%", inline=True)
     
-    if member.avatar:
-        embed.set_thumbnail(url=member.avatar.url)
+    embed.set_thumbnail(url=avatar_url(member))
         
     embed.set_footer(text="Points are earned by winning matches")
     
-    await ctx.respond(embed=embed)
+    await ctx.followup.send(embed=embed)
     
 @bot.slash_command(
     name="leaderboard",
     description="Show the top players by points"
 )
 async def leaderboard_command(ctx):
+    await ctx.defer()
     try:
         top_players = await db.get_leaderboard(10)
         
@@ -1283,7 +1526,7 @@ async def leaderboard_command(ctx):
                 description="No players have earned points yet.",
                 color=WARNING_COLOR
             )
-            await ctx.respond(embed=embed)
+            await ctx.followup.send(embed=embed)
             return
         
         embed = discord.Embed(
@@ -1292,16 +1535,25 @@ async def leaderboard_command(ctx):
             color=PRIMARY_COLOR
         )
         
+        # Resolve members from the cache, fetching any missing ones in a single gateway request
+        ids = [int(player.discord_id) for player in top_players]
+        members = {member_id: member for member_id in ids if (member := ctx.guild.get_member(member_id))}
+        missing = [member_id for member_id in ids if member_id not in members]
+        if missing:
+            try:
+                fetched = await ctx.guild.query_members(user_ids=missing, limit=len(missing), cache=True)
+                members.update({member.id: member for member in fetched})
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                logger.warning(f"Could not fetch leaderboard members: {e}")
+        
         leaderboard_text = ""
-        for i, player in enumerate(top_players):
-            discord_id = player['discord_id']
-            points = player['points']
-            matches = player['matches_played']
-            wins = player['wins']
+        for i, (player, member_id) in enumerate(zip(top_players, ids)):
+            points = player.points
+            matches = player.matches_played
+            wins = player.wins
             
-            # Try to get member from Discord
-            member = ctx.guild.get_member(int(discord_id))
-            name = member.display_name if member else f"Unknown Player ({discord_id})"
+            member = members.get(member_id)
+            name = member.display_name if member else f"Unknown Player ({member_id})"
             
             # Add medal for top 3
             medal = ""
@@ -1317,7 +1569,7 @@ async def leaderboard_command(ctx):
         embed.add_field(name="Top Players", value=leaderboard_text, inline=False)
         embed.set_footer(text="Updated in real-time")
         
-        await ctx.respond(embed=embed)
+        await ctx.followup.send(embed=embed)
     except Exception as e:
         logger.error(f"Error getting leaderboard: {e}")
         embed = discord.Embed(
@@ -1325,21 +1577,18 @@ async def leaderboard_command(ctx):
             description="❌ There was an error retrieving the leaderboard.",
             color=WARNING_COLOR
         )
-        await ctx.respond(embed=embed, ephemeral=True)
+        await ctx.followup.send(embed=embed)
 
 @bot.slash_command(
     name="win",
     description="Report match results and award points (Admin only)"
 )
-@permissions.has_any_role("Owner", "COM MODERATOR", "COM ADMIN", "COM CAPTAIN")
+@permissions.has_any_role(*ADMIN_ROLES)
 async def win_command(
     ctx, 
     team: Option(str, "Winning team (team1 or team2)", required=True, choices=["team1", "team2", "1", "2"])
 ):
-    allowed_roles = ["Owner", "COM MODERATOR", "COM ADMIN", "COM CAPTAIN"]
-    user_roles = [role.name for role in ctx.author.roles]
-
-    if not any(role in user_roles for role in allowed_roles):
+    if ADMIN_ROLES.isdisjoint(role.name for role in ctx.author.roles):
         embed = discord.Embed(
             title="Permission Error",
             description="❌ You do not have the required role to use this command.",
@@ -1349,19 +1598,8 @@ async def win_command(
         return
         
     # Get queue number from channel name
-    queue_num = None
-    if ctx.channel.name.startswith("queue-") and "-chat" in ctx.channel.name:
-        try:
-            queue_num = int(ctx.channel.name.split("-")[1])
-        except ValueError:
-            embed = discord.Embed(
-                title="Invalid Channel",
-                description="❌ Could not determine queue number from channel name.",
-                color=WARNING_COLOR
-            )
-            await ctx.respond(embed=embed, ephemeral=True)
-            return
-    else:
+    queue_num = queue_num_from_channel(ctx.channel)
+    if queue_num is None:
         embed = discord.Embed(
             title="Wrong Channel",
             description="❌ This command can only be used in a queue chat channel.",
@@ -1371,7 +1609,8 @@ async def win_command(
         return
         
     # Check if queue exists
-    if queue_num not in queues:
+    queue = get_queue(ctx.guild, queue_num)
+    if queue is None:
         embed = discord.Embed(
             title="Queue Not Found",
             description=f"❌ Queue {queue_num} does not exist.",
@@ -1379,8 +1618,6 @@ async def win_command(
         )
         await ctx.respond(embed=embed)
         return
-        
-    queue = queues[queue_num]
     
     # Check if match is active
     if not queue.match_id:
@@ -1415,6 +1652,9 @@ async def win_command(
     # Determine winning team number
     winning_team = 1 if team.lower() in ["team1", "1"] else 2
     
+    # Acknowledge before the database work so a slow query can't miss the 3s interaction deadline
+    await ctx.defer()
+    
     # Update match in database
     success = await db.update_match_winner(queue.match_id, winning_team)
     if not success:
@@ -1423,7 +1663,7 @@ async def win_command(
             description="❌ Failed to update match result in database.",
             color=WARNING_COLOR
         )
-        await ctx.respond(embed=embed)
+        await ctx.followup.send(embed=embed)
         return
         
     # Update player points
@@ -1434,15 +1674,9 @@ async def win_command(
     WIN_POINTS = 20  # Points awarded for winning a match
     LOSS_POINTS = 0  # Points awarded for losing a match
     
-    # Update database for winners
-    winner_points_updates = []
-    for player in winners:
-        winner_points_updates.append(db.update_player_points(player.id, WIN_POINTS, win=True, username=player.display_name))
-    
-    # Update database for losers
-    loser_points_updates = []
-    for player in losers:
-        loser_points_updates.append(db.update_player_points(player.id, LOSS_POINTS, win=False, username=player.display_name))
+    # Update database for winners and losers in one query
+    if not await db.bulk_update_points(winners, WIN_POINTS, losers, LOSS_POINTS):
+        logger.error(f"Failed to update player points for match {queue.match_id}")
     
     # Mark match as reported
     queue.match_reported = True
@@ -1454,19 +1688,20 @@ async def win_command(
         color=SUCCESS_COLOR
     )
     
+    # Get points for all players in a single query
+    points = await db.get_players_points(p.id for p in chain(winners, losers))
+    
     # Show winners
     winners_team = "Team A" if winning_team == 1 else "Team B"
     winners_list = ""
     for player in winners:
-        points = await db.get_player_points(player.id)
-        winners_list += f"**{player.display_name}** [**{points}** pts] (+{WIN_POINTS})\n"
+        winners_list += f"**{player.display_name}** [**{points[player.id]}** pts] (+{WIN_POINTS})\n"
     
     # Show losers
     losers_team = "Team B" if winning_team == 1 else "Team A"
     losers_list = ""
     for player in losers:
-        points = await db.get_player_points(player.id)
-        losers_list += f"**{player.display_name}** [{points} pts]\n"
+        losers_list += f"**{player.display_name}** [{points[player.id]} pts]\n"
     
     result_embed.add_field(
         name=f"🏆 {winners_team} (Winner)",
@@ -1488,20 +1723,22 @@ async def win_command(
     
     # Reset voice channel permissions after match
     guild = ctx.guild
-    team1_vc = discord.utils.get(guild.voice_channels, name=queue.team1_vc_name)
-    team2_vc = discord.utils.get(guild.voice_channels, name=queue.team2_vc_name)
+    team1_vc = get_vc(guild, queue.team1_vc_name)
+    team2_vc = get_vc(guild, queue.team2_vc_name)
     
     if team1_vc and team2_vc:
-        try:
-            # Reset permissions on team voice channels
-            for vc in [team1_vc, team2_vc]:
-                await vc.set_permissions(guild.default_role, connect=False)
-                for player in queue.team1 + queue.team2:
-                    await vc.set_permissions(player, overwrite=None)
-        except discord.Forbidden:
-            logger.error("Missing permissions to reset voice channel permissions")
-        except Exception as e:
-            logger.error(f"Error resetting voice channel permissions: {e}")
+        # Reset permissions on both team voice channels at once, dropping every member overwrite
+        edits = []
+        for vc in [team1_vc, team2_vc]:
+            overwrites = {target: ow for target, ow in vc.overwrites.items() if not isinstance(target, discord.Member)}
+            overwrites[guild.default_role] = discord.PermissionOverwrite(connect=False)
+            edits.append(with_rate_limit_retry(vc.edit, overwrites=overwrites))
+        
+        for result in await asyncio.gather(*edits, return_exceptions=True):
+            if isinstance(result, discord.Forbidden):
+                logger.error("Missing permissions to reset voice channel permissions")
+            elif isinstance(result, Exception):
+                logger.error(f"Error resetting voice channel permissions: {result}")
     
     # Clean up the queue but preserve the match ID
     match_id = queue.match_id
@@ -1511,16 +1748,15 @@ async def win_command(
     queue.chosen_map = chosen_map  # Keep chosen map
     queue.match_reported = True  # Mark as reported
     
-    # Show match results
-    await ctx.respond(embed=result_embed)
-    
     # Notify that queue has been reset
     reset_embed = discord.Embed(
         title=f"Queue {queue_num} Reset",
         description=f"Queue {queue_num} has been reset and is ready for new players.\nUse `/join {queue_num}` to join the queue!",
         color=INFO_COLOR
     )
-    await ctx.send(embed=reset_embed)
+    
+    # Show match results and the reset notice in one message
+    await ctx.followup.send(embeds=[result_embed, reset_embed])
 
 @bot.slash_command(
     name="stats",
@@ -1532,19 +1768,8 @@ async def stats_command(
 ):
     # If no queue number is provided, get it from the channel name
     if queue_num is None:
-        if ctx.channel.name.startswith("queue-") and "-chat" in ctx.channel.name:
-            try:
-                queue_num = int(ctx.channel.name.split("-")[1])
-            except ValueError:
-                embed = discord.Embed(
-                    title="Invalid Queue",
-                    description="❌ Could not determine queue number from channel name. Please specify a queue number.",
-                    color=WARNING_COLOR
-                )
-                await ctx.respond(embed=embed, ephemeral=True)
-                return
-            return
-        else:
+        queue_num = queue_num_from_channel(ctx.channel)
+        if queue_num is None:
             embed = discord.Embed(
                 title="Queue Number Required",
                 description="❌ Please specify a queue number (e.g., `/stats 1`).",
@@ -1552,62 +1777,63 @@ async def stats_command(
             )
             await ctx.respond(embed=embed, ephemeral=True)
             return
+    
+    await ctx.defer()
             
     try:
         stats = await db.get_queue_stats(queue_num, 5)
-        if stats:
-            recent_matches = stats['recent_matches']
-            team1_wins = stats['team1_wins']
-            team2_wins = stats['team2_wins']
-            most_common_maps = stats['most_common_maps']
-            
-            if not recent_matches:
-                embed = discord.Embed(
-                    title=f"Queue {queue_num} Stats",
-                    description=f"No match history found for Queue {queue_num}.",
-                    color=WARNING_COLOR
-                )
-                await ctx.respond(embed=embed)
-                return
-            
+        if not stats:
             embed = discord.Embed(
-                title=f"Queue {queue_num} - Match Statistics",
-                description=f"Statistics for Queue {queue_num}",
-                color=PRIMARY_COLOR
+                title=f"Queue {queue_num} Stats",
+                description=f"No match history found for Queue {queue_num}.",
+                color=WARNING_COLOR
             )
+            await ctx.followup.send(embed=embed)
+            return
             
-            # Add match history
-            match_history = ""
-            for i, match in enumerate(recent_matches):
-                winner = "Team A" if match['winner_team'] == 1 else "Team B"
-                map_played = match['map_played']
-                date = match['timestamp'].strftime("%m/%d/%Y")
-                match_history += f"{i+1}. **{winner}** won on **{map_played}** ({date})\n"
-                
-            embed.add_field(
-                name="Recent Matches",
-                value=match_history or "No recent matches",
-                inline=False
-            )
+        recent_matches = stats['recent_matches']
+        team1_wins = stats['team1_wins']
+        team2_wins = stats['team2_wins']
+        most_common_maps = stats['most_common_maps']
+        
+        embed = discord.Embed(
+            title=f"Queue {queue_num} - Match Statistics",
+            description=f"Statistics for Queue {queue_num}",
+            color=PRIMARY_COLOR
+        )
+        
+        # Add match history
+        match_history = ""
+        for i, match in enumerate(recent_matches):
+            winner = "Team A" if match['winner_team'] == 1 else "Team B"
+            map_played = match['map_played']
+            date = match['timestamp'].strftime("%m/%d/%Y")
+            match_history += f"{i+1}. **{winner}** won on **{map_played}** ({date})\n"
             
-            # Add team stats
-            team_stats = f"**Team A Wins:** {team1_wins}\n**Team B Wins:** {team2_wins}"
+        embed.add_field(
+            name="Recent Matches",
+            value=match_history or "No recent matches",
+            inline=False
+        )
+        
+        # Add team stats
+        team_stats = f"**Team A Wins:** {team1_wins}\n**Team B Wins:** {team2_wins}"
+        embed.add_field(
+            name="Team Statistics",
+            value=team_stats,
+            inline=True
+        )
+        
+        # Add map stats
+        if most_common_maps:
+            map_stats = "\n".join([f"**{map_name}**: {count} times" for map_name, count in most_common_maps])
             embed.add_field(
-                name="Team Statistics",
-                value=team_stats,
+                name="Most Played Maps",
+                value=map_stats,
                 inline=True
             )
             
-            # Add map stats
-            if most_common_maps:
-                map_stats = "\n".join([f"**{map_name}**: {count} times" for map_name, count in most_common_maps])
-                embed.add_field(
-                    name="Most Played Maps",
-                    value=map_stats,
-                    inline=True
-                )
-                
-            await ctx.respond(embed=embed)
+        await ctx.followup.send(embed=embed)
     except Exception as e:
         logger.error(f"Error getting queue stats: {e}")
         embed = discord.Embed(
@@ -1615,7 +1841,7 @@ async def stats_command(
             description="❌ There was an error retrieving the queue statistics.",
             color=WARNING_COLOR
         )
-        await ctx.respond(embed=embed, ephemeral=True)
+        await ctx.followup.send(embed=embed)
 
 # Get bot token from environment variable for security
 # Make sure to set the DISCORD_BOT_TOKEN environment variable
@@ -1627,4 +1853,5 @@ if bot_token == "YOUR_BOT_TOKEN_HERE":
     logger.warning("Using default bot token! Set the DISCORD_BOT_TOKEN environment variable for production use.")
 
 # Start the bot
-bot.run(bot_token)
+if __name__ == "__main__":
+    bot.run(bot_token)
@@ -11,22 +11,16 @@ This module handles all database-related functionality:
 Configuration is stored in DB_CONFIG dictionary.
 """
 
-import mysql.connector
-from mysql.connector import Error
+import aiomysql
+from aiomysql import Error
 import logging
+import logs
 import asyncio
-from collections import Counter
+from collections import OrderedDict, namedtuple
 import datetime
+import os
+import time
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("db.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("db")
 
 # Database connection configuration
@@ -35,174 +29,374 @@ logger = logging.getLogger("db")
 # - DB_USER: MySQL username (default: root)
 # - DB_PASSWORD: MySQL password (default: password)
 # - DB_DATABASE: MySQL database name (default: discord_tournament)
+# - DB_READ_HOST: optional read replica for read-only queries (default: DB_HOST)
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', 'localhost'),
     'user': os.environ.get('DB_USER', 'root'),
     'password': os.environ.get('DB_PASSWORD', 'password'),
     'database': os.environ.get('DB_DATABASE', 'discord_tournament')
 }
+DB_READ_HOST = os.environ.get('DB_READ_HOST', DB_CONFIG['host'])
+
+# Connection pool size
+POOL_MIN_SIZE = 5
+POOL_MAX_SIZE = 25
+READ_POOL_MAX_SIZE = 40
+
+# Shared aiomysql connection pool, created by initialize_database()
+pool = None
+# Pool for read-only queries, so leaderboard/history reads don't queue behind writes
+read_pool = None
+
+# In-process LRU cache of player points: discord_id -> (points, expires_at)
+POINTS_CACHE_SIZE = 1024
+POINTS_CACHE_TTL = 30  # seconds
+_points_cache = OrderedDict()
+
+# Leaderboard row; rows come off a plain tuple cursor instead of one dict per row
+LeaderboardEntry = namedtuple("LeaderboardEntry", "discord_id points matches_played wins")
+
+# Leaderboard cache: limit -> (rows, expires_at), cleared whenever points are written
+LEADERBOARD_CACHE_TTL = 60  # seconds
+_leaderboard_cache = {}
+_leaderboard_lock = asyncio.Lock()
+
+# Write-behind buffer of match player rows: (match_id, discord_id, team_number, username),
+# drained in batches by _match_player_writer so match setup never waits on these inserts
+WRITE_BATCH_SIZE = 100
+WRITE_FLUSH_INTERVAL = 0.05  # seconds
+_write_queue = asyncio.Queue()
+_writer_task = None
+_unwritten = []  # Rows taken by the writer when it was cancelled, written by flush()
 
 # ==========================================
 # Connection Management
 # ==========================================
 
-def create_connection():
-    """Create a connection to the MySQL database"""
+async def execute_query(query, params=None, fetch=False, many=False):
+    """Execute a query on a pooled connection with proper error handling"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    if many and params:
+                        await cursor.executemany(query, params)
+                    else:
+                        await cursor.execute(query, params)
+
+                    if fetch:
+                        return await cursor.fetchall()
+                    return cursor.lastrowid
+        logger.error("Database connection pool is not initialized")
     except Error as e:
-        logger.error(f"Error connecting to MySQL database: {e}")
+        logger.error(f"Database error: {e}")
+    return None
+
+async def create_pool():
+    """Create the shared connection pool and, when DB_READ_HOST points elsewhere, the read-only pool"""
+    global pool, read_pool
+    # initialize_database runs again on every on_ready, so keep the pools already open
+    if pool is not None:
+        return pool
+    try:
+        pool = await aiomysql.create_pool(
+            host=DB_CONFIG['host'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database'],
+            minsize=POOL_MIN_SIZE,
+            maxsize=POOL_MAX_SIZE,
+            autocommit=True
+        )
+    except Error as e:
+        logger.error(f"Error creating MySQL connection pool: {e}")
         logger.info("Make sure you've set the correct database environment variables (DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE)")
         return None
 
-def execute_query(query, params=None, fetch=False, many=False):
-    """Execute a query with proper error handling"""
+    # A second pool to the same server would only add connections, so reads share the main pool
+    if DB_READ_HOST == DB_CONFIG['host']:
+        read_pool = pool
+        return pool
     try:
-        conn = create_connection()
-        if not conn:
-            logger.error("Failed to create database connection")
-            return None
-
-        cursor = conn.cursor(dictionary=True) if fetch else conn.cursor()
-        
-        if many and params:
-            cursor.executemany(query, params)
-        elif params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-            
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            conn.commit()
-            result = cursor.lastrowid
-            
-        cursor.close()
-        conn.close()
-        return result
+        read_pool = await aiomysql.create_pool(
+            host=DB_READ_HOST,
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database'],
+            minsize=POOL_MIN_SIZE,
+            maxsize=READ_POOL_MAX_SIZE,
+            autocommit=True
+        )
+        return pool
     except Error as e:
-        logger.error(f"Database error: {e}")
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
+        logger.error(f"Error creating MySQL read pool for {DB_READ_HOST}: {e}")
+        await close_pools()
         return None
 
+async def close_pools():
+    """Close the connection pools and wait for their connections to be released"""
+    global pool, read_pool
+    if read_pool is not None and read_pool is not pool:
+        read_pool.close()
+        await read_pool.wait_closed()
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+    pool = read_pool = None
+
 # ==========================================
 # Database Initialization
 # ==========================================
 
+# Secondary indexes: (table, index name, columns)
+INDEXES = (
+    ("matches", "idx_matches_queue_ts", "queue_number, timestamp"),  # get_match_history / get_queue_stats
+    ("match_players", "idx_mp_match", "match_id"),  # get_match_details and the matches foreign key
+)
+
+# Columns holding Discord snowflakes, stored as BIGINT UNSIGNED
+DISCORD_ID_COLUMNS = (
+    ("players", "discord_id"),
+    ("matches", "team1_captain"),
+    ("matches", "team2_captain"),
+    ("match_players", "player_id"),
+)
+
+async def _ensure_bigint_column(cursor, table, column):
+    """Convert a Discord ID column from its old VARCHAR type to BIGINT UNSIGNED"""
+    await cursor.execute(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    row = await cursor.fetchone()
+    if row and row[0].lower() == "varchar":
+        await cursor.execute(f"ALTER TABLE {table} MODIFY {column} BIGINT UNSIGNED")
+        logger.info(f"Converted {table}.{column} to BIGINT UNSIGNED")
+
+async def _ensure_player_first_primary_key(cursor):
+    """Re-key match_players created with PRIMARY KEY (match_id, player_id) to (player_id, match_id)"""
+    await cursor.execute(
+        "SELECT column_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = 'match_players' "
+        "AND index_name = 'PRIMARY' AND seq_in_index = 1"
+    )
+    row = await cursor.fetchone()
+    if row and row[0].lower() == "match_id":
+        # idx_mp_match keeps the foreign key indexed once the primary key no longer leads with match_id
+        await cursor.execute("ALTER TABLE match_players DROP PRIMARY KEY, ADD PRIMARY KEY (player_id, match_id)")
+        logger.info("Re-keyed match_players by (player_id, match_id)")
+
+    # The old secondary index duplicates the new primary key
+    await cursor.execute(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = 'match_players' AND index_name = 'idx_mp_player' LIMIT 1"
+    )
+    if await cursor.fetchone():
+        await cursor.execute("DROP INDEX idx_mp_player ON match_players")
+
+async def _ensure_index(cursor, table, index, columns):
+    """Create an index unless it already exists (MySQL has no CREATE INDEX IF NOT EXISTS)"""
+    await cursor.execute(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+        (table, index)
+    )
+    if not await cursor.fetchone():
+        await cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+        logger.info(f"Created index {index} on {table}")
+
 async def initialize_database():
-    """Create database and tables if they don't exist"""
+    """Create database and tables if they don't exist, then open the connection pool"""
     try:
         # Create database if it doesn't exist
-        conn = mysql.connector.connect(
+        conn = await aiomysql.connect(
             host=DB_CONFIG['host'],
             user=DB_CONFIG['user'],
             password=DB_CONFIG['password']
         )
-        
+
         if conn:
-            cursor = conn.cursor()
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-            cursor.close()
+            async with conn.cursor() as cursor:
+                await cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
             conn.close()
-            
+
             # Connect to the created database
-            conn = create_connection()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Create players table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS players (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    discord_id VARCHAR(32) UNIQUE,
-                    username VARCHAR(100),
-                    points INT DEFAULT 0,
-                    matches_played INT DEFAULT 0,
-                    wins INT DEFAULT 0,
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Create matches table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS matches (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    queue_number INT,
-                    team1_captain VARCHAR(32),
-                    team2_captain VARCHAR(32),
-                    winner_team INT,
-                    map_played VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Create match_players table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS match_players (
-                    match_id INT,
-                    player_id VARCHAR(32),
-                    team_number INT,
-                    FOREIGN KEY (match_id) REFERENCES matches(id) ON DELETE CASCADE,
-                    PRIMARY KEY (match_id, player_id)
-                )
-                """)
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
+            if await create_pool():
+                async with pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        # Create players table
+                        await cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS players (
+                            id INT AUTO_INCREMENT PRIMARY KEY,
+                            discord_id BIGINT UNSIGNED UNIQUE,
+                            username VARCHAR(100),
+                            points INT DEFAULT 0,
+                            matches_played INT DEFAULT 0,
+                            wins INT DEFAULT 0,
+                            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                        )
+                        """)
+
+                        # Create matches table
+                        await cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS matches (
+                            id INT AUTO_INCREMENT PRIMARY KEY,
+                            queue_number INT,
+                            team1_captain BIGINT UNSIGNED,
+                            team2_captain BIGINT UNSIGNED,
+                            winner_team INT,
+                            map_played VARCHAR(50),
+                            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            INDEX idx_matches_queue_ts (queue_number, timestamp)
+                        )
+                        """)
+
+                        # Create match_players table
+                        await cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS match_players (
+                            match_id INT,
+                            player_id BIGINT UNSIGNED,
+                            team_number INT,
+                            FOREIGN KEY (match_id) REFERENCES matches(id) ON DELETE CASCADE,
+                            PRIMARY KEY (player_id, match_id),
+                            INDEX idx_mp_match (match_id)
+                        )
+                        """)
+
+                        # Convert Discord ID columns of tables created when they were VARCHAR(32)
+                        for table, column in DISCORD_ID_COLUMNS:
+                            await _ensure_bigint_column(cursor, table, column)
+
+                        # Add the indexes to tables created before they existed
+                        for table, index, columns in INDEXES:
+                            await _ensure_index(cursor, table, index, columns)
+
+                        # Cluster match_players by player for player-centric history lookups
+                        await _ensure_player_first_primary_key(cursor)
+
+                # Start the background writer for queued match player rows
+                global _writer_task
+                if _writer_task is None or _writer_task.done():
+                    _writer_task = asyncio.create_task(_match_player_writer())
+
                 logger.info("Database initialized successfully")
                 return True
     except Error as e:
         logger.error(f"Error initializing database: {e}")
     return False
 
+# ==========================================
+# Points Cache
+# ==========================================
+
+def _get_cached_points(discord_id):
+    """Return a player's cached points, or None if missing or expired"""
+    entry = _points_cache.get(discord_id)
+    if entry is None:
+        return None
+    points, expires_at = entry
+    if expires_at < time.monotonic():
+        del _points_cache[discord_id]
+        return None
+    _points_cache.move_to_end(discord_id)
+    return points
+
+def _cache_points(discord_id, points):
+    """Store a player's points, evicting the least recently used entry when full"""
+    _points_cache[discord_id] = (points, time.monotonic() + POINTS_CACHE_TTL)
+    _points_cache.move_to_end(discord_id)
+    if len(_points_cache) > POINTS_CACHE_SIZE:
+        _points_cache.popitem(last=False)
+
+def _evict_points(*discord_ids):
+    """Drop cached points for players whose points were written"""
+    for discord_id in discord_ids:
+        _points_cache.pop(int(discord_id), None)
+
 # ==========================================
 # Player Management Functions
 # ==========================================
 
 async def get_player_points(discord_id):
     """Get a player's points from the database"""
+    discord_id = int(discord_id)
+    cached = _get_cached_points(discord_id)
+    if cached is not None:
+        return cached
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT points FROM players WHERE discord_id = %s", (str(discord_id),))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return result['points']
-            else:
-                # Player not found, create player entry
-                await create_player(discord_id, 0)
-                return 0
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute("SELECT points FROM players WHERE discord_id = %s", (discord_id,))
+                    result = await cursor.fetchone()
+
+                    # Player not found, create the entry on the same connection
+                    if not result:
+                        await cursor.execute(
+                            "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, 0)",
+                            (discord_id,)
+                        )
+
+            points = result['points'] if result else 0
+            _cache_points(discord_id, points)
+            return points
     except Error as e:
         logger.error(f"Error getting player points: {e}")
     return 0
 
+async def get_players_points(discord_ids):
+    """Get points for several players in one query, as a {discord_id: points} dict"""
+    discord_ids = [int(discord_id) for discord_id in discord_ids]
+    points = {discord_id: _get_cached_points(discord_id) for discord_id in discord_ids}
+    discord_ids = [discord_id for discord_id, value in points.items() if value is None]
+    if not discord_ids:
+        return points
+    points.update(dict.fromkeys(discord_ids, 0))
+    try:
+        if pool:
+            placeholders = ", ".join(["%s"] * len(discord_ids))
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(
+                        f"SELECT discord_id, points FROM players WHERE discord_id IN ({placeholders})",
+                        discord_ids
+                    )
+                    rows = await cursor.fetchall()
+
+                    # Create entries for players not found, like get_player_points does
+                    found = {row['discord_id'] for row in rows}
+                    missing = [(discord_id, 0) for discord_id in discord_ids if discord_id not in found]
+                    if missing:
+                        await cursor.executemany(
+                            "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, %s)",
+                            missing
+                        )
+
+            for row in rows:
+                points[row['discord_id']] = row['points']
+            for discord_id in discord_ids:
+                _cache_points(discord_id, points[discord_id])
+    except Error as e:
+        logger.error(f"Error getting players points: {e}")
+    return points
+
 async def create_player(discord_id, points=0, username=None):
     """Create a new player in the database"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            if username:
-                cursor.execute(
-                    "INSERT IGNORE INTO players (discord_id, points, username) VALUES (%s, %s, %s)",
-                    (str(discord_id), points, username)
-                )
-            else:
-                cursor.execute(
-                    "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, %s)",
-                    (str(discord_id), points)
-                )
-            conn.commit()
-            cursor.close()
-            conn.close()
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    if username:
+                        await cursor.execute(
+                            "INSERT IGNORE INTO players (discord_id, points, username) VALUES (%s, %s, %s)",
+                            (int(discord_id), points, username)
+                        )
+                    else:
+                        await cursor.execute(
+                            "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, %s)",
+                            (int(discord_id), points)
+                        )
             return True
     except Error as e:
         logger.error(f"Error creating player: {e}")
@@ -210,47 +404,61 @@ async def create_player(discord_id, points=0, username=None):
 
 async def update_player_points(discord_id, points_to_add, win=False, username=None):
     """Update a player's points in the database"""
+    return await update_many_player_points([(discord_id, username, points_to_add, win)])
+
+async def update_many_player_points(rows):
+    """Record match results for several players in one multi-row upsert
+
+    rows are (discord_id, username, points_to_add, win) tuples; a None username keeps the stored one.
+    """
+    rows = [(int(discord_id), username, points, 1 if win else 0) for discord_id, username, points, win in rows]
+    if not rows:
+        return True
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            if username:
-                cursor.execute(
-                    "INSERT INTO players (discord_id, points, matches_played, wins, username) VALUES (%s, %s, 1, %s, %s) "
-                    "ON DUPLICATE KEY UPDATE points = points + %s, matches_played = matches_played + 1, wins = wins + %s, username = %s",
-                    (str(discord_id), points_to_add, 1 if win else 0, username, points_to_add, 1 if win else 0, username)
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO players (discord_id, points, matches_played, wins) VALUES (%s, %s, 1, %s) "
-                    "ON DUPLICATE KEY UPDATE points = points + %s, matches_played = matches_played + 1, wins = wins + %s",
-                    (str(discord_id), points_to_add, 1 if win else 0, points_to_add, 1 if win else 0)
-                )
-            conn.commit()
-            cursor.close()
-            conn.close()
+        if pool:
+            placeholders = ", ".join(["(%s, %s, %s, 1, %s)"] * len(rows))
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        f"INSERT INTO players (discord_id, username, points, matches_played, wins) VALUES {placeholders} "
+                        "ON DUPLICATE KEY UPDATE points = points + VALUES(points), matches_played = matches_played + 1, "
+                        "wins = wins + VALUES(wins), username = COALESCE(VALUES(username), username)",
+                        [value for row in rows for value in row]
+                    )
+            _evict_points(*(row[0] for row in rows))
+            _leaderboard_cache.clear()
             return True
     except Error as e:
         logger.error(f"Error updating player points: {e}")
     return False
 
+async def bulk_update_points(winners, win_points, losers, loss_points):
+    """Record a match result for every player in one multi-row upsert"""
+    rows = [(p.id, p.display_name, win_points, True) for p in winners]
+    rows += [(p.id, p.display_name, loss_points, False) for p in losers]
+    return await update_many_player_points(rows)
+
 async def get_player_stats(discord_id):
     """Get a player's complete stats"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM players WHERE discord_id = %s", (str(discord_id),))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute("SELECT * FROM players WHERE discord_id = %s", (int(discord_id),))
+                    result = await cursor.fetchone()
+
+                    # Player not found, create the entry on the same connection
+                    if not result:
+                        await cursor.execute(
+                            "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, 0)",
+                            (int(discord_id),)
+                        )
+
             if result:
                 return result
             else:
-                await create_player(discord_id)
                 return {
-                    'discord_id': str(discord_id),
+                    'discord_id': int(discord_id),
                     'points': 0,
                     'matches_played': 0,
                     'wins': 0
@@ -262,21 +470,19 @@ async def get_player_stats(discord_id):
 async def get_player_match_history(discord_id, limit=5):
     """Get a player's match history"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT m.*, mp.team_number 
-                FROM matches m 
-                JOIN match_players mp ON m.id = mp.match_id 
-                WHERE mp.player_id = %s 
-                ORDER BY m.timestamp DESC 
-                LIMIT %s
-            """, (str(discord_id), limit))
-            
-            matches = cursor.fetchall()
-            cursor.close()
-            conn.close()
+        if read_pool:
+            async with read_pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute("""
+                        SELECT m.*, mp.team_number
+                        FROM matches m
+                        JOIN match_players mp ON m.id = mp.match_id
+                        WHERE mp.player_id = %s
+                        ORDER BY m.timestamp DESC
+                        LIMIT %s
+                    """, (int(discord_id), limit))
+
+                    matches = await cursor.fetchall()
             return matches
     except Error as e:
         logger.error(f"Error getting player match history: {e}")
@@ -289,18 +495,15 @@ async def get_player_match_history(discord_id, limit=5):
 async def create_match(queue_num, team1_captain, team2_captain, map_played):
     """Create a new match in the database"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO matches (queue_number, team1_captain, team2_captain, map_played) "
-                "VALUES (%s, %s, %s, %s)",
-                (queue_num, str(team1_captain.id), str(team2_captain.id), map_played)
-            )
-            conn.commit()
-            match_id = cursor.lastrowid
-            cursor.close()
-            conn.close()
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "INSERT INTO matches (queue_number, team1_captain, team2_captain, map_played) "
+                        "VALUES (%s, %s, %s, %s)",
+                        (queue_num, team1_captain.id, team2_captain.id, map_played)
+                    )
+                    match_id = cursor.lastrowid
             logger.info(f"Created match {match_id} for queue {queue_num}")
             return match_id
     except Error as e:
@@ -308,51 +511,104 @@ async def create_match(queue_num, team1_captain, team2_captain, map_played):
     return None
 
 async def register_players_in_match(match_id, team1, team2):
-    """Register all players in a match"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Register team 1 players
-            for player in team1:
-                cursor.execute(
-                    "INSERT INTO match_players (match_id, player_id, team_number) VALUES (%s, %s, 1)",
-                    (match_id, str(player.id))
+    """Queue all players of a match for registration by the background writer"""
+    if not pool:
+        return False
+    for team_number, team in ((1, team1), (2, team2)):
+        for player in team:
+            _write_queue.put_nowait((match_id, player.id, team_number, player.display_name))
+    return True
+
+async def _insert_match_players(rows):
+    """Insert a batch of queued match player rows in a single transaction"""
+    async with pool.acquire() as conn:
+        # Both inserts commit together, or not at all
+        await conn.begin()
+        try:
+            async with conn.cursor() as cursor:
+                # Create missing players and refresh usernames first; executemany sends each INSERT
+                # as one multi-row statement
+                await cursor.executemany(
+                    "INSERT INTO players (discord_id, points, username) VALUES (%s, 0, %s) "
+                    "ON DUPLICATE KEY UPDATE username = VALUES(username)",
+                    [(discord_id, username) for _, discord_id, _, username in rows]
                 )
-                # Create player if not exists
-                await create_player(str(player.id), username=player.display_name)
-                
-            # Register team 2 players
-            for player in team2:
-                cursor.execute(
-                    "INSERT INTO match_players (match_id, player_id, team_number) VALUES (%s, %s, 2)",
-                    (match_id, str(player.id))
+                # Rows handed back by a cancelled writer may already be written, so re-inserting is a no-op
+                await cursor.executemany(
+                    "INSERT INTO match_players (match_id, player_id, team_number) VALUES (%s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE team_number = VALUES(team_number)",
+                    [(match_id, discord_id, team_number) for match_id, discord_id, team_number, _ in rows]
                 )
-                # Create player if not exists
-                await create_player(str(player.id), username=player.display_name)
-                
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-    except Error as e:
-        logger.error(f"Error registering players in match: {e}")
-    return False
+            await conn.commit()
+        except Error:
+            await conn.rollback()
+            raise
+
+async def _write_match_players(rows):
+    """Write queued match player rows, retrying match by match if a mixed batch fails"""
+    by_match = {}
+    for row in rows:
+        by_match.setdefault(row[0], []).append(row)
+
+    if len(by_match) > 1:
+        try:
+            await _insert_match_players(rows)
+            return
+        except Error as e:
+            logger.warning(f"Error registering players of {len(by_match)} matches together, retrying per match: {e}")
+
+    for match_id, match_rows in by_match.items():
+        try:
+            await _insert_match_players(match_rows)
+        except Error as e:
+            lost = ", ".join(f"({match_id}, {discord_id})" for _, discord_id, _, _ in match_rows)
+            logger.error(f"Error registering players in match {match_id}, dropped (match_id, player_id) rows {lost}: {e}")
+
+async def _match_player_writer():
+    """Drain the write-behind queue, batching rows that arrive close together"""
+    while True:
+        batch = [await _write_queue.get()]
+        try:
+            await asyncio.sleep(WRITE_FLUSH_INTERVAL)
+            while len(batch) < WRITE_BATCH_SIZE and not _write_queue.empty():
+                batch.append(_write_queue.get_nowait())
+            await _write_match_players(batch)
+        except asyncio.CancelledError:
+            _unwritten.extend(batch)
+            raise
+        except Exception:
+            logger.exception(f"Unexpected error writing {len(batch)} match player rows")
+
+async def flush():
+    """Stop the background writer and write every queued match player row directly"""
+    global _writer_task
+    if _writer_task is not None:
+        # On a signal shutdown the loop has usually cancelled the writer already
+        if not _writer_task.done():
+            _writer_task.cancel()
+            try:
+                await _writer_task
+            except asyncio.CancelledError:
+                pass
+        _writer_task = None
+
+    rows = _unwritten[:]
+    _unwritten.clear()
+    while not _write_queue.empty():
+        rows.append(_write_queue.get_nowait())
+    if rows and pool:
+        await _write_match_players(rows)
 
 async def update_match_winner(match_id, winning_team):
     """Update the match with the winning team"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE matches SET winner_team = %s WHERE id = %s",
-                (winning_team, match_id)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
+        if pool:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "UPDATE matches SET winner_team = %s WHERE id = %s",
+                        (winning_team, match_id)
+                    )
             logger.info(f"Updated match {match_id} with winner: Team {winning_team}")
             return True
     except Error as e:
@@ -362,38 +618,27 @@ async def update_match_winner(match_id, winning_team):
 async def get_match_details(match_id):
     """Get complete details about a match"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get match data
-            cursor.execute("SELECT * FROM matches WHERE id = %s", (match_id,))
-            match = cursor.fetchone()
-            
-            if not match:
-                cursor.close()
-                conn.close()
-                return None
-                
-            # Get players for team 1
-            cursor.execute("""
-                SELECT p.* FROM players p
-                JOIN match_players mp ON p.discord_id = mp.player_id
-                WHERE mp.match_id = %s AND mp.team_number = 1
-            """, (match_id,))
-            team1_players = cursor.fetchall()
-            
-            # Get players for team 2
-            cursor.execute("""
-                SELECT p.* FROM players p
-                JOIN match_players mp ON p.discord_id = mp.player_id
-                WHERE mp.match_id = %s AND mp.team_number = 2
-            """, (match_id,))
-            team2_players = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
+        if read_pool:
+            async with read_pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    # Get match data
+                    await cursor.execute("SELECT * FROM matches WHERE id = %s", (match_id,))
+                    match = await cursor.fetchone()
+
+                    if not match:
+                        return None
+
+                    # Get the players of both teams in one query and split them by team
+                    await cursor.execute("""
+                        SELECT p.*, mp.team_number FROM players p
+                        JOIN match_players mp ON p.discord_id = mp.player_id
+                        WHERE mp.match_id = %s
+                    """, (match_id,))
+                    players = await cursor.fetchall()
+
+            team1_players = [p for p in players if p['team_number'] == 1]
+            team2_players = [p for p in players if p['team_number'] == 2]
+
             return {
                 'match': match,
                 'team1': team1_players,
@@ -409,17 +654,24 @@ async def get_match_details(match_id):
 
 async def get_leaderboard(limit=10):
     """Get the top players by points"""
+    entry = _leaderboard_cache.get(limit)
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM players ORDER BY points DESC LIMIT %s",
-                (limit,)
-            )
-            top_players = cursor.fetchall()
-            cursor.close()
-            conn.close()
+        if read_pool:
+            # Only one caller refreshes an expired entry, the rest reuse its result
+            async with _leaderboard_lock:
+                entry = _leaderboard_cache.get(limit)
+                if entry and entry[1] > time.monotonic():
+                    return entry[0]
+                async with read_pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(
+                            "SELECT discord_id, points, matches_played, wins FROM players ORDER BY points DESC LIMIT %s",
+                            (limit,)
+                        )
+                        top_players = [LeaderboardEntry._make(row) for row in await cursor.fetchall()]
+                _leaderboard_cache[limit] = (top_players, time.monotonic() + LEADERBOARD_CACHE_TTL)
             return top_players
     except Error as e:
         logger.error(f"Error getting leaderboard: {e}")
@@ -428,24 +680,21 @@ async def get_leaderboard(limit=10):
 async def get_match_history(queue_num=None, limit=5):
     """Get match history, optionally filtered by queue"""
     try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            if queue_num is not None:
-                cursor.execute(
-                    "SELECT * FROM matches WHERE queue_number = %s ORDER BY timestamp DESC LIMIT %s",
-                    (queue_num, limit)
-                )
-            else:
-                cursor.execute(
-                    "SELECT * FROM matches ORDER BY timestamp DESC LIMIT %s",
-                    (limit,)
-                )
-                
-            matches = cursor.fetchall()
-            cursor.close()
-            conn.close()
+        if read_pool:
+            async with read_pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    if queue_num is not None:
+                        await cursor.execute(
+                            "SELECT * FROM matches WHERE queue_number = %s ORDER BY timestamp DESC LIMIT %s",
+                            (queue_num, limit)
+                        )
+                    else:
+                        await cursor.execute(
+                            "SELECT * FROM matches ORDER BY timestamp DESC LIMIT %s",
+                            (limit,)
+                        )
+
+                    matches = await cursor.fetchall()
             return matches
     except Error as e:
         logger.error(f"Error getting match history: {e}")
@@ -454,368 +703,59 @@ async def get_match_history(queue_num=None, limit=5):
 async def get_queue_stats(queue_num, limit=5):
     """Get statistics for a specific queue"""
     try:
-        recent_matches = await get_match_history(queue_num, limit)
-        
-        if not recent_matches:
-            return None
-            
-        # Count wins per team
-        team1_wins = sum(1 for match in recent_matches if match['winner_team'] == 1)
-        team2_wins = sum(1 for match in recent_matches if match['winner_team'] == 2)
-        
-        # Calculate most played maps
-        map_counts = Counter([match['map_played'] for match in recent_matches if match['map_played'
-
-"""
-Database module for Discord Tournament Bot
-
-This module handles all database interactions including:
-- Database initialization
-- Player stats tracking
-- Match history
-- Leaderboard functionality
-
-Configuration is stored in DB_CONFIG and can be modified as needed.
-"""
-
-import mysql.connector
-from mysql.connector import Error
-import logging
-import asyncio
-from collections import Counter
-import datetime
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("db.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("db")
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'password',
-    'database': 'discord_tournament'
-}
-
-# Database connection and initialization functions
-def create_connection():
-    """Create a connection to the MySQL database"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except Error as e:
-        logger.error(f"Error connecting to MySQL database: {e}")
-        return None
+        if read_pool:
+            # Recent matches plus win and map tallies over them, in one round-trip
+            async with read_pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute("""
+                        SELECT m.*,
+                            SUM(m.winner_team = 1) OVER () AS team1_wins,
+                            SUM(m.winner_team = 2) OVER () AS team2_wins,
+                            COUNT(*) OVER (PARTITION BY m.map_played) AS map_count
+                        FROM (
+                            SELECT * FROM matches WHERE queue_number = %s ORDER BY timestamp DESC LIMIT %s
+                        ) m
+                        ORDER BY m.timestamp DESC
+                    """, (queue_num, limit))
+                    recent_matches = await cursor.fetchall()
 
-async def initialize_database():
-    """Create database and tables if they don't exist"""
-    try:
-        # Create database if it doesn't exist
-        conn = mysql.connector.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password']
-        )
-        
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-            cursor.close()
-            conn.close()
-            
-            # Connect to the created database
-            conn = create_connection()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Create players table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS players (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    discord_id VARCHAR(32) UNIQUE,
-                    username VARCHAR(100),
-                    points INT DEFAULT 0,
-                    matches_played INT DEFAULT 0,
-                    wins INT DEFAULT 0,
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Create matches table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS matches (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    queue_number INT,
-                    team1_captain VARCHAR(32),
-                    team2_captain VARCHAR(32),
-                    winner_team INT,
-                    map_played VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Create match_players table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS match_players (
-                    match_id INT,
-                    player_id VARCHAR(32),
-                    team_number INT,
-                    FOREIGN KEY (match_id) REFERENCES matches(id) ON DELETE CASCADE,
-                    PRIMARY KEY (match_id, player_id)
-                )
-                """)
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
-                logger.info("Database initialized successfully")
-                return True
-    except Error as e:
-        logger.error(f"Error initializing database: {e}")
-    return False
-
-# Player data functions
-async def get_player_points(discord_id):
-    """Get a player's points from the database"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT points FROM players WHERE discord_id = %s", (str(discord_id),))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return result['points']
-            else:
-                # Player not found, create player entry
-                await create_player(discord_id, 0)
-                return 0
-    except Error as e:
-        logger.error(f"Error getting player points: {e}")
-    return 0
-
-async def create_player(discord_id, points=0, username=None):
-    """Create a new player in the database"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            if username:
-                cursor.execute(
-                    "INSERT IGNORE INTO players (discord_id, points, username) VALUES (%s, %s, %s)",
-                    (str(discord_id), points, username)
-                )
-            else:
-                cursor.execute(
-                    "INSERT IGNORE INTO players (discord_id, points) VALUES (%s, %s)",
-                    (str(discord_id), points)
-                )
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-    except Error as e:
-        logger.error(f"Error creating player: {e}")
-    return False
-
-async def update_player_points(discord_id, points_to_add, win=False, username=None):
-    """Update a player's points in the database"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            if username:
-                cursor.execute(
-                    "INSERT INTO players (discord_id, points, matches_played, wins, username) VALUES (%s, %s, 1, %s, %s) "
-                    "ON DUPLICATE KEY UPDATE points = points + %s, matches_played = matches_played + 1, wins = wins + %s, username = %s",
-                    (str(discord_id), points_to_add, 1 if win else 0, username, points_to_add, 1 if win else 0, username)
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO players (discord_id, points, matches_played, wins) VALUES (%s, %s, 1, %s) "
-                    "ON DUPLICATE KEY UPDATE points = points + %s, matches_played = matches_played + 1, wins = wins + %s",
-                    (str(discord_id), points_to_add, 1 if win else 0, points_to_add, 1 if win else 0)
-                )
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-    except Error as e:
-        logger.error(f"Error updating player points: {e}")
-    return False
-
-async def get_player_stats(discord_id):
-    """Get a player's complete stats"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM players WHERE discord_id = %s", (str(discord_id),))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return result
-            else:
-                await create_player(discord_id)
-                return {
-                    'discord_id': str(discord_id),
-                    'points': 0,
-                    'matches_played': 0,
-                    'wins': 0
-                }
-    except Error as e:
-        logger.error(f"Error getting player stats: {e}")
-    return None
-
-# Match tracking functions
-async def create_match(queue_num, team1_captain, team2_captain, map_played):
-    """Create a new match in the database"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO matches (queue_number, team1_captain, team2_captain, map_played) "
-                "VALUES (%s, %s, %s, %s)",
-                (queue_num, str(team1_captain.id), str(team2_captain.id), map_played)
-            )
-            conn.commit()
-            match_id = cursor.lastrowid
-            cursor.close()
-            conn.close()
-            return match_id
-    except Error as e:
-        logger.error(f"Error creating match: {e}")
-    return None
-
-async def register_players_in_match(match_id, team1, team2):
-    """Register all players in a match"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Register team 1 players
-            for player in team1:
-                cursor.execute(
-                    "INSERT INTO match_players (match_id, player_id, team_number) VALUES (%s, %s, 1)",
-                    (match_id, str(player.id))
-                )
-                # Create player if not exists
-                await create_player(str(player.id), username=player.display_name)
-                
-            # Register team 2 players
-            for player in team2:
-                cursor.execute(
-                    "INSERT INTO match_players (match_id, player_id, team_number) VALUES (%s, %s, 2)",
-                    (match_id, str(player.id))
-                )
-                # Create player if not exists
-                await create_player(str(player.id), username=player.display_name)
-                
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-    except Error as e:
-        logger.error(f"Error registering players in match: {e}")
-    return False
-
-async def update_match_winner(match_id, winning_team):
-    """Update the match with the winning team"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE matches SET winner_team = %s WHERE id = %s",
-                (winning_team, match_id)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-    except Error as e:
-        logger.error(f"Error updating match winner: {e}")
-    return False
-
-async def get_leaderboard(limit=10):
-    """Get the top players by points"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM players ORDER BY points DESC LIMIT %s",
-                (limit,)
-            )
-            top_players = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return top_players
-    except Error as e:
-        logger.error(f"Error getting leaderboard: {e}")
-    return []
-
-async def get_queue_stats(queue_num, limit=5):
-    """Get statistics for a specific queue"""
-    try:
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM matches WHERE queue_number = %s ORDER BY timestamp DESC LIMIT %s",
-                (queue_num, limit)
-            )
-            recent_matches = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            
             if not recent_matches:
                 return None
-                
-            # Count wins per team
-            team1_wins = sum(1 for match in recent_matches if match['winner_team'] == 1)
-            team2_wins = sum(1 for match in recent_matches if match['winner_team'] == 2)
-            
-            # Calculate most played maps
-            map_counts = Counter([match['map_played'] for match in recent_matches if match['map_played']])
-            most_common_maps = map_counts.most_common(3)
-            
+
+            # Most played maps, ties in order of recency like Counter.most_common
+            map_counts = {match['map_played']: match['map_count'] for match in recent_matches if match['map_played']}
+            most_common_maps = sorted(map_counts.items(), key=lambda kv: kv[1], reverse=True)[:3]
+
             return {
                 'recent_matches': recent_matches,
-                'team1_wins': team1_wins,
-                'team2_wins': team2_wins,
+                'team1_wins': int(recent_matches[0]['team1_wins'] or 0),
+                'team2_wins': int(recent_matches[0]['team2_wins'] or 0),
                 'most_common_maps': most_common_maps
             }
     except Error as e:
         logger.error(f"Error getting queue stats: {e}")
     return None
 
-# Test connection when module is imported
-def test_connection():
-    conn = create_connection()
-    if conn:
-        logger.info("Database connection successful")
+# Test connection when run directly
+async def test_connection():
+    """Check that the database server is reachable with DB_CONFIG"""
+    try:
+        conn = await aiomysql.connect(
+            host=DB_CONFIG['host'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database']
+        )
         conn.close()
+        logger.info("Database connection successful")
         return True
-    else:
-        logger.error("Database connection failed")
+    except Error as e:
+        logger.error(f"Database connection failed: {e}")
+        logger.info("Make sure you've set the correct database environment variables (DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE)")
         return False
 
 if __name__ == "__main__":
     # Test database connection if run directly
-    test_connection()
+    logs.setup_logging("db.log")
+    asyncio.run(test_connection())
     print("Database module initialized. Run this within the bot for full functionality.")
-
@@ -1,26 +1,45 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import datetime
+import logging
+import logs
+import loops
+import os
 
-intents = discord.Intents.default()
-intents.members = True
-intents.voice_states = True
+# Optional: pip install "py-cord[speed]" and gateway payloads are decoded with msgspec instead of the stdlib json
+
+# Set up logging
+logs.setup_logging("help_bot.log")
+logger = logging.getLogger("help_bot")
+
+# Only channel events and guild messages are used; message content is needed for the prefix commands
+intents = discord.Intents.none()
 intents.guilds = True
-intents.messages = True
+intents.guild_messages = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="/", intents=intents, help_command=None)  # Disable default help command
+# Nothing reads the member list or the message cache, so skip chunking and caching
+bot = commands.Bot(
+    command_prefix="/",
+    intents=intents,
+    help_command=None,  # Disable default help command
+    chunk_guilds_at_startup=False,
+    max_messages=None
+)
+
+# Help embed, built once at import and reused by every /help
+HELP_EMBED = discord.Embed(title="🤖 COM BOT Command Menu", color=discord.Color.blue())
+HELP_EMBED.add_field(name="/join", value="Join the player queue (up to 10 players).", inline=False)
+HELP_EMBED.add_field(name="/resetqueue", value="Reset the queue and teams. (Admin only)", inline=False)
+HELP_EMBED.add_field(name="/queue", value="Display the current list of players in the queue.", inline=False)
+HELP_EMBED.add_field(name="/purge <number>", value="Delete the last <number> messages in the current channel. (Admin only)", inline=False)
+HELP_EMBED.set_footer(text="Use the commands as per your requirements and have fun! 🎮")
 
 # ✅ Custom /help command
 @bot.command(name="help")
 async def custom_help(ctx):
-    embed = discord.Embed(title="🤖 COM BOT Command Menu", color=discord.Color.blue())
-    embed.add_field(name="/join", value="Join the player queue (up to 10 players).", inline=False)
-    embed.add_field(name="/resetqueue", value="Reset the queue and teams. (Admin only)", inline=False)
-    embed.add_field(name="/queue", value="Display the current list of players in the queue.", inline=False)
-    embed.add_field(name="/purge <number>", value="Delete the last <number> messages in the current channel. (Admin only)", inline=False)
-    embed.set_footer(text="Use the commands as per your requirements and have fun! 🎮")
-    await ctx.send(embed=embed)
+    await ctx.send(embed=HELP_EMBED)
 
 # ✅ Manual Purge Command
 @bot.command()
@@ -30,28 +49,140 @@ async def purge(ctx, amount: int):
         await ctx.send("❌ Please specify a number greater than 0.")
         return
     await ctx.channel.purge(limit=amount + 1)
-    confirmation = await ctx.send(f"✅ Deleted {amount} messages.")
-    await confirmation.delete(delay=3)
+    await ctx.send(f"✅ Deleted {amount} messages.", delete_after=3)
+
+# Last message ID seen in each "com-register" channel at the previous purge
+last_seen = {}
+
+# Discord refuses to bulk delete messages older than 14 days; stay an hour clear so a message
+# crossing the limit mid-request can't fail the whole batch
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=13, hours=23)
+
+# Guild ID -> "com-register" channel ID, kept in sync by the channel events below
+register_channels = {}
+
+def cache_register_channel(guild):
+    """Look up a guild's "com-register" channel once and remember its ID"""
+    com_channel = discord.utils.get(guild.text_channels, name="com-register")
+    if com_channel:
+        register_channels[guild.id] = com_channel.id
+    else:
+        register_channels.pop(guild.id, None)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    cache_register_channel(channel.guild)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    cache_register_channel(channel.guild)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if before.name != after.name:
+        cache_register_channel(after.guild)
 
-# ✅ Auto-purge messages every 10 seconds in "com-register" channel
-@tasks.loop(seconds=10)
+@bot.event
+async def on_guild_join(guild):
+    cache_register_channel(guild)
+
+async def purge_com_channel(com_channel):
+    """Bulk delete the recent messages of one "com-register" channel"""
+    # One bulk-delete request per page of 100, leaving out messages too old to bulk delete;
+    # history(after=...) pages oldest first, so keep going until a short page reaches the newest
+    while True:
+        cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        messages = [message async for message in com_channel.history(limit=100, after=cutoff)]
+        if len(messages) > 1:
+            await com_channel.delete_messages(messages)
+        elif messages:
+            await messages[0].delete()
+        if len(messages) < 100:
+            break
+    last_seen[com_channel.id] = com_channel.last_message_id
+
+# Register messages waiting to be deleted, per channel; each queue is drained by its own flusher task
+DELETE_BATCH_SIZE = 100  # bulk delete limit
+DELETE_BATCH_WINDOW = 0.5  # seconds
+delete_queues = {}
+delete_flushers = {}
+
+async def delete_flusher(channel, pending):
+    """Delete queued messages in bulk, once DELETE_BATCH_WINDOW has passed or DELETE_BATCH_SIZE is reached"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await pending.get()]
+        deadline = loop.time() + DELETE_BATCH_WINDOW
+        try:
+            while len(batch) < DELETE_BATCH_SIZE:
+                batch.append(await asyncio.wait_for(pending.get(), timeout=deadline - loop.time()))
+        except asyncio.TimeoutError:
+            pass
+
+        try:
+            if len(batch) > 1:
+                await channel.delete_messages(batch)
+            else:
+                await batch[0].delete()
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            logger.warning(f"⚠️ Missing permissions to delete messages in #{channel.name}")
+        except Exception:
+            logger.exception(f"❌ Error deleting messages in #{channel.name}")
+
+# ✅ Delete messages in "com-register" shortly after they are posted
+@bot.event
+async def on_message(message):
+    await bot.process_commands(message)
+    if message.guild and register_channels.get(message.guild.id) == message.channel.id:
+        pending = delete_queues.get(message.channel.id)
+        if pending is None:
+            pending = delete_queues[message.channel.id] = asyncio.Queue(maxsize=1000)
+            delete_flushers[message.channel.id] = asyncio.create_task(delete_flusher(message.channel, pending))
+        try:
+            pending.put_nowait(message)
+        except asyncio.QueueFull:
+            pass  # Left for the safety sweep
+
+# ✅ Safety sweep every 5 minutes for anything on_message missed (e.g. while offline)
+@tasks.loop(minutes=5)
 async def auto_purge_com_register():
+    # Skip channels with no new messages since the last purge
+    channels = [
+        com_channel for channel_id in register_channels.values()
+        if (com_channel := bot.get_channel(channel_id))
+        and com_channel.last_message_id != last_seen.get(com_channel.id)
+    ]
+
+    # Purge every guild's channel concurrently
+    results = await asyncio.gather(*(purge_com_channel(c) for c in channels), return_exceptions=True)
+    for com_channel, result in zip(channels, results):
+        if isinstance(result, discord.Forbidden):
+            logger.warning(f"⚠️ Missing permissions to purge messages in #{com_channel.name}")
+        elif isinstance(result, Exception):
+            logger.error(f"❌ Error purging #{com_channel.name}", exc_info=result)
+
+# Wait for the cache once before the first tick instead of on every iteration
+@auto_purge_com_register.before_loop
+async def before_auto_purge():
     await bot.wait_until_ready()
-    for guild in bot.guilds:
-        com_channel = discord.utils.get(guild.text_channels, name="com-register")
-        if com_channel:
-            try:
-                await com_channel.purge(limit=100)
-            except discord.Forbidden:
-                print(f"Missing permissions to purge messages in #{com_channel.name}")
-            except Exception as e:
-                print(f"Error purging #{com_channel.name}: {e}")
 
 # ✅ Start the purge task when bot is ready
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    auto_purge_com_register.start()
+    logger.info(f"✅ Logged in as {bot.user}")
+    for guild in bot.guilds:
+        cache_register_channel(guild)
+    # on_ready fires again after reconnects, so only start the loop once
+    if not auto_purge_com_register.is_running():
+        auto_purge_com_register.start()
+
+# 🔒 Read the bot token from the DISCORD_BOT_TOKEN environment variable
+async def main():
+    async with bot:
+        await bot.start(os.environ["DISCORD_BOT_TOKEN"])
 
-# 🔒 Replace with your real bot token
-bot.run("MTM2ODQ2ODI5OTc3OTkzNjM3Ng.Gpyr0o.Hqwa8c6sjm0EPqm2mqKVMlALQIH08J9RT7ttdQ")
+if __name__ == "__main__":
+    with asyncio.Runner(loop_factory=loops.new_event_loop) as runner:
+        runner.run(main())
@@ -0,0 +1,37 @@
+"""Logging setup shared by the bots and the database module; call setup_logging once from the entry point"""
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import logging
+import queue
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Records waiting for the listener thread; past this, new records are dropped rather than piling up in memory
+LOG_QUEUE_SIZE = 10000
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records while the queue is full instead of reporting an error"""
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop waits for room in a full queue instead of failing"""
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+def setup_logging(filename):
+    """Log to filename and the console from a background thread, so file writes never block the event loop"""
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handlers = (logging.FileHandler(filename), logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = DrainingQueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The listener's handlers add the timestamp/level prefix, so the queued record only carries the message
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
@@ -0,0 +1,17 @@
+"""Event loop setup shared by the tournament bot and the help bot"""
+import asyncio
+import logging
+
+logger = logging.getLogger("loops")
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+def new_event_loop():
+    """Create uvloop's faster event loop when it is installed (pip install uvloop), else asyncio's"""
+    if uvloop is None:
+        return asyncio.new_event_loop()
+    logger.info("✅ Using uvloop event loop")
+    return uvloop.new_event_loop()